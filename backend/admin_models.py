@@ -36,3 +36,29 @@ class WebsiteSettings(db.Model):
             'value': self.value,
             'updated_at': self.updated_at.isoformat()
         }
+
+class ImageJob(db.Model):
+    # Background processing of an uploaded image; polled by the admin UI
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    image_url = db.Column(db.String(255), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Stale job lookups filter by status and age
+        db.Index('ix_image_job_status_updated_at', 'status', 'updated_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'image_url': self.image_url,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
@@ -1,23 +1,68 @@
-from flask import Blueprint, jsonify, request, session, send_from_directory
+from flask import Blueprint, jsonify, request, session, send_file, Response, stream_with_context, current_app
 from models import Product, Order, OrderItem
-from admin_models import Admin, WebsiteSettings
+from admin_models import Admin, WebsiteSettings, ImageJob
 from database import db
+from catalog import PRODUCT_FIELDS, serialize_rows
+from order_export import iter_export, EXPORT_FORMATS
+from instrumentation import query_budget
+import settings_cache
+import facets
+import rollups
+import stats
 from functools import wraps
-import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from werkzeug.datastructures import FileStorage
+import io
 import os
-from werkzeug.utils import secure_filename
 from PIL import Image
+from images import optimize_logo, variant_urls
+import image_jobs
+import upload_store
+import profiling
+import reservations
 
 admin_api = Blueprint('admin_api', __name__)
 
 # Configuration for file uploads
-UPLOAD_FOLDER = 'uploads/products'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Order listing page sizes
+ORDERS_PAGE_SIZE = 50
+MAX_ORDERS_PAGE_SIZE = 200
+
+# Order columns of the admin order list, in response field order
+ORDER_LIST_FIELDS = ('id', 'customer_name', 'email', 'phone', 'address', 'city',
+                     'zip_code', 'total_price', 'status', 'created_at')
+ORDER_LIST_COLUMNS = [getattr(Order, field) for field in ORDER_LIST_FIELDS]
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def parse_date_arg(value, end_of_day=False):
+    """Parse an ISO date or datetime query argument; a bare date used as an upper bound covers the whole day."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def order_filters(args):
+    """Build the status / date range conditions shared by the order listing and export."""
+    filters = []
+    status = args.get('status')
+    if status:
+        filters.append(Order.status == status)
+    date_from = parse_date_arg(args.get('date_from'))
+    if date_from:
+        filters.append(Order.created_at >= date_from)
+    date_to = parse_date_arg(args.get('date_to'), end_of_day=True)
+    if date_to:
+        filters.append(Order.created_at < date_to)
+    return filters
+
 # Simple session-based authentication
 def admin_required(f):
     @wraps(f)
@@ -64,6 +109,31 @@ def check_auth():
             }), 200
     return jsonify({'authenticated': False}), 200
 
+def is_image(file):
+    """Check the upload is an image Pillow can read; only the header is parsed."""
+    try:
+        Image.open(file.stream)
+        return True
+    except Exception:
+        return False
+    finally:
+        file.seek(0)
+
+def store_upload(file, kind, url_prefix):
+    """
+    Save an upload and return (url, job). Identical bytes are stored once and
+    reuse the image job that already processed them.
+    """
+    url, created = upload_store.store(file, url_prefix, file.filename)
+    job = None if created else image_jobs.existing_job(db.session, url)
+    if job is None:
+        # Logos are optimized before they are stored; only product uploads have work left
+        job = image_jobs.create_job(db.session, kind, url, 'pending' if kind == 'product' else 'ready')
+        db.session.commit()
+        if job.status == 'pending':
+            image_jobs.submit(current_app._get_current_object(), job)
+    return url, job
+
 # Image Upload Route
 @admin_api.route('/upload-image', methods=['POST'])
 @admin_required
@@ -88,46 +158,22 @@ def upload_image():
         if file_size > MAX_FILE_SIZE:
             return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
         
-        # Generate secure filename
-        original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{secrets.token_hex(16)}.{file_extension}"
+        if not is_image(file):
+            return jsonify({'error': 'File is not a valid image'}), 400
         
-        # Create upload directory if it doesn't exist
-        upload_path = os.path.join(os.path.dirname(__file__), UPLOAD_FOLDER)
-        os.makedirs(upload_path, exist_ok=True)
-        
-        # Save file
-        file_path = os.path.join(upload_path, unique_filename)
-        file.save(file_path)
-        
-        # Optimize image
-        try:
-            img = Image.open(file_path)
-            # Convert to RGB if necessary
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            # Resize if too large (max 1200px width)
-            max_width = 1200
-            if img.width > max_width:
-                ratio = max_width / img.width
-                new_size = (max_width, int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            # Save optimized image
-            img.save(file_path, optimize=True, quality=85)
-        except Exception as e:
-            print(f"Image optimization error: {e}")
-        
-        # Return URL
-        image_url = f"/uploads/products/{unique_filename}"
+        # Store under a content hash; resizing and variants are done by the image workers
+        image_url, job = store_upload(file, 'product', '/uploads/products/')
         
         return jsonify({
-            'message': 'Image uploaded successfully',
+            'message': 'Image uploaded, processing',
             'image_url': image_url,
-            'filename': unique_filename
-        }), 201
+            'image_variants': variant_urls(image_url),
+            'filename': image_url.rsplit('/', 1)[1],
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
 # Logo Upload Route
@@ -154,58 +200,89 @@ def upload_logo():
         if file_size > MAX_FILE_SIZE:
             return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
         
-        # Generate secure filename
-        original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"logo_{secrets.token_hex(8)}.{file_extension}"
-        
-        # Create upload directory for logos
-        logo_folder = 'uploads/logos'
-        upload_path = os.path.join(os.path.dirname(__file__), logo_folder)
-        os.makedirs(upload_path, exist_ok=True)
+        if not is_image(file):
+            return jsonify({'error': 'File is not a valid image'}), 400
         
-        # Save file
-        file_path = os.path.join(upload_path, unique_filename)
-        file.save(file_path)
-        
-        # Optimize image (logos should be smaller)
-        try:
-            img = Image.open(file_path)
-            # Preserve transparency for logos
-            # Resize if too large (max 500px width for logos)
-            max_width = 500
-            if img.width > max_width:
-                ratio = max_width / img.width
-                new_size = (max_width, int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            # Save optimized image
-            if img.mode == 'RGBA':
-                img.save(file_path, 'PNG', optimize=True)
-            else:
-                if img.mode in ('P',):
-                    img = img.convert('RGB')
-                img.save(file_path, optimize=True, quality=90)
-        except Exception as e:
-            print(f"Logo optimization error: {e}")
-        
-        # Return URL
-        logo_url = f"/uploads/logos/{unique_filename}"
+        # Optimize first, so the content hash names the bytes that are served
+        data, ext = optimize_logo(file.stream, file.filename.rsplit('.', 1)[1].lower())
+        logo = FileStorage(io.BytesIO(data), filename=f'logo.{ext}')
+        logo_url, job = store_upload(logo, 'logo', '/uploads/logos/')
         
         return jsonify({
-            'message': 'Logo uploaded successfully',
+            'message': 'Logo uploaded',
             'logo_url': logo_url,
-            'filename': unique_filename
+            'filename': logo_url.rsplit('/', 1)[1],
+            'job': job.to_dict()
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+@admin_api.route('/image-jobs/<job_id>', methods=['GET'])
+@admin_required
+def get_image_job(job_id):
+    job = ImageJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict()), 200
+
+@admin_api.route('/image-jobs', methods=['GET'])
+@admin_required
+@query_budget(1)
+def get_image_jobs():
+    # Poll several uploads at once: ?ids=a,b,c
+    ids = [i for i in request.args.get('ids', '').split(',') if i][:100]
+    jobs = ImageJob.query.filter(ImageJob.id.in_(ids)).all() if ids else []
+    return jsonify({
+        'jobs': [job.to_dict() for job in jobs],
+        'all_ready': all(job.status == 'ready' for job in jobs) and len(jobs) == len(ids)
+    }), 200
+
+@admin_api.route('/uploads/gc', methods=['POST'])
+@admin_required
+def collect_upload_garbage():
+    # Remove uploads no product or logo uses any more; ?dry_run=1 only reports them
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        result = upload_store.collect_garbage(db.session, dry_run=dry_run)
+        db.session.commit()
+        return jsonify({'dry_run': dry_run, **result}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Profiling Routes
+@admin_api.route('/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    # Captured request profiles, newest first; ?endpoint=api.get_products narrows the list
+    profiles = profiling.list_profiles(current_app.config['PROFILE_DIR'], request.args.get('endpoint'))
+    return jsonify({'enabled': current_app.config['PROFILING'], 'profiles': profiles}), 200
+
+@admin_api.route('/profiles/<endpoint>/<profile_id>', methods=['GET'])
+@admin_required
+def download_profile(endpoint, profile_id):
+    path = profiling.profile_path(current_app.config['PROFILE_DIR'], endpoint, profile_id)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='text/plain', as_attachment=True,
+                     download_name=f'{endpoint}-{profile_id}{profiling.PROFILE_SUFFIX}')
+
 # Product Management Routes
 @admin_api.route('/products', methods=['GET'])
 @admin_required
+@query_budget(1)
 def get_all_products():
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products]), 200
+    # Stock on hand: units held by checkouts in progress are already out of Product.stock
+    held = reservations.held_units()
+    columns = [
+        (Product.stock + func.coalesce(held.c.units, 0)).label('stock') if field == 'stock'
+        else getattr(Product, field)
+        for field in PRODUCT_FIELDS
+    ]
+    rows = db.session.execute(
+        select(*columns).outerjoin(held, held.c.product_id == Product.id)
+    ).all()
+    return jsonify(serialize_rows(rows, PRODUCT_FIELDS)), 200
 
 @admin_api.route('/products', methods=['POST'])
 @admin_required
@@ -223,6 +300,8 @@ def create_product():
         )
         
         db.session.add(new_product)
+        stats.adjust(db.session, total_products=1)
+        facets.refresh_categories(db.session, [new_product.category])
         db.session.commit()
         
         return jsonify({
@@ -240,18 +319,31 @@ def update_product(id):
     data = request.json
     
     try:
+        old_category = product.category
         product.name = data.get('name', product.name)
         product.description = data.get('description', product.description)
         product.price = float(data.get('price', product.price))
         product.image_url = data.get('image_url', product.image_url)
         product.category = data.get('category', product.category)
-        product.stock = int(data.get('stock', product.stock))
+        if 'stock' in data:
+            # The admin edits stock on hand; units held by checkouts stay out of Product.stock
+            on_hand = int(data['stock'])
+            held = reservations.held_for(db.session, product.id)
+            if on_hand < held:
+                db.session.rollback()
+                return jsonify({'error': f'{held} units are held by checkouts in progress; '
+                                         f'stock cannot be set below that'}), 409
+            # Subtracted in the UPDATE itself, so holds placed or released meanwhile are counted
+            product.stock = on_hand - reservations.held_units_of(product.id)
+        facets.refresh_categories(db.session, [old_category, product.category])
         
         db.session.commit()
         
+        product_dict = product.to_dict()
+        product_dict['stock'] += reservations.held_for(db.session, product.id)
         return jsonify({
             'message': 'Product updated successfully',
-            'product': product.to_dict()
+            'product': product_dict
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -263,7 +355,11 @@ def delete_product(id):
     product = Product.query.get_or_404(id)
     
     try:
+        # Holds reference the product; their units go with it
+        reservations.drop_product_holds(db.session, product.id)
         db.session.delete(product)
+        stats.adjust(db.session, total_products=-1)
+        facets.refresh_categories(db.session, [product.category])
         db.session.commit()
         return jsonify({'message': 'Product deleted successfully'}), 200
     except Exception as e:
@@ -273,36 +369,70 @@ def delete_product(id):
 # Order Management Routes
 @admin_api.route('/orders', methods=['GET'])
 @admin_required
+@query_budget(3)
 def get_all_orders():
-    orders = Order.query.order_by(Order.id.desc()).all()
+    try:
+        limit = max(1, min(int(request.args.get('limit', ORDERS_PAGE_SIZE)), MAX_ORDERS_PAGE_SIZE))
+        cursor = request.args.get('cursor', type=int)
+        filters = order_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid filter: {str(e)}'}), 400
+
+    # Plain row tuples for the page and, in one more query, all of its items;
+    # no ORM objects are built
+    stmt = select(*ORDER_LIST_COLUMNS).where(*filters)
+    if cursor:
+        stmt = stmt.where(Order.id < cursor)
+
+    rows = db.session.execute(stmt.order_by(Order.id.desc()).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
     orders_data = []
-    
-    for order in orders:
-        order_dict = {
-            'id': order.id,
-            'customer_name': order.customer_name,
-            'email': order.email,
-            'phone': order.phone,
-            'address': order.address,
-            'city': order.city,
-            'zip_code': order.zip_code,
-            'total_price': order.total_price,
-            'status': order.status,
-            'items': []
-        }
-        
-        for item in order.items:
-            product = Product.query.get(item.product_id)
-            order_dict['items'].append({
-                'id': item.id,
-                'product_name': product.name if product else 'Unknown',
-                'quantity': item.quantity,
-                'price': item.price
-            })
-        
-        orders_data.append(order_dict)
-    
-    return jsonify(orders_data), 200
+    items_by_order = {}
+    for row in rows:
+        order = dict(zip(ORDER_LIST_FIELDS, row))
+        if order['created_at'] is not None:
+            order['created_at'] = order['created_at'].isoformat()
+        order['items'] = items_by_order[order['id']] = []
+        orders_data.append(order)
+
+    if rows:
+        items = db.session.execute(
+            select(OrderItem.order_id, OrderItem.id, func.coalesce(Product.name, 'Unknown'),
+                   OrderItem.quantity, OrderItem.price)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+            .where(OrderItem.order_id.in_(items_by_order))
+            .order_by(OrderItem.order_id, OrderItem.id)
+        )
+        for order_id, item_id, product_name, quantity, price in items:
+            items_by_order[order_id].append(
+                {'id': item_id, 'product_name': product_name, 'quantity': quantity, 'price': price}
+            )
+
+    return jsonify({
+        'orders': orders_data,
+        'next_cursor': rows[-1].id if has_more else None
+    }), 200
+
+@admin_api.route('/orders/export', methods=['GET'])
+@admin_required
+def export_orders():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Invalid format. Allowed: csv, ndjson'}), 400
+
+    try:
+        filters = order_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid filter: {str(e)}'}), 400
+
+    filename = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(iter_export(db.session, fmt, filters)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @admin_api.route('/orders/<int:id>/status', methods=['PUT'])
 @admin_required
@@ -311,7 +441,9 @@ def update_order_status(id):
     data = request.json
     
     try:
+        old_status = order.status
         order.status = data.get('status', order.status)
+        stats.order_status_changed(db.session, old_status, order.status)
         db.session.commit()
         
         return jsonify({
@@ -345,6 +477,7 @@ def update_settings():
                 new_setting = WebsiteSettings(key=key, value=value)
                 db.session.add(new_setting)
         
+        settings_cache.invalidate(db.session)
         db.session.commit()
         return jsonify({'message': 'Settings updated successfully'}), 200
     except Exception as e:
@@ -354,15 +487,48 @@ def update_settings():
 # Dashboard Statistics
 @admin_api.route('/dashboard/stats', methods=['GET'])
 @admin_required
+@query_budget(2)
 def get_dashboard_stats():
-    total_products = Product.query.count()
-    total_orders = Order.query.count()
-    pending_orders = Order.query.filter_by(status='Pending').count()
-    total_revenue = db.session.query(db.func.sum(Order.total_price)).scalar() or 0
-    
+    return jsonify(stats.get(db.session).to_dict()), 200
+
+# Sales Analytics (served from the rollup tables)
+def analytics_range(granularity='day'):
+    end = parse_date_arg(request.args.get('date_to'), end_of_day=True) or datetime.utcnow()
+    start = parse_date_arg(request.args.get('date_from')) or end - rollups.DEFAULT_RANGES[granularity]
+    return start, end
+
+@admin_api.route('/analytics/sales', methods=['GET'])
+@admin_required
+@query_budget(2)
+def get_sales_analytics():
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in rollups.GRANULARITIES:
+        return jsonify({'error': 'Invalid granularity. Allowed: hour, day'}), 400
+
+    try:
+        start, end = analytics_range(granularity)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {str(e)}'}), 400
+
+    return jsonify({
+        'granularity': granularity,
+        'date_from': start.isoformat(),
+        'date_to': end.isoformat(),
+        'series': rollups.sales_series(db.session, granularity, start, end)
+    }), 200
+
+@admin_api.route('/analytics/top-products', methods=['GET'])
+@admin_required
+@query_budget(2)
+def get_top_products():
+    try:
+        start, end = analytics_range()
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+
     return jsonify({
-        'total_products': total_products,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'total_revenue': float(total_revenue)
+        'date_from': start.isoformat(),
+        'date_to': end.isoformat(),
+        'products': rollups.top_products(db.session, start, end, limit)
     }), 200
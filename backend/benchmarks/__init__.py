@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the backend. Run from backend/, e.g.
+`python -m benchmarks.boot_time`.
+"""
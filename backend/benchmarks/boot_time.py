@@ -0,0 +1,111 @@
+"""
+Worker boot time.
+
+Each run imports `app` in a fresh interpreter, as a gunicorn worker does,
+and reports how long the import took and how many SQL statements it ran.
+Worker startup must not touch the database, so any statement is reported
+as a failure. The one-time `bootstrap` step is timed separately.
+
+    python -m benchmarks.boot_time --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line
+_IMPORT_SCRIPT = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+statements = []
+event.listen(Engine, 'before_cursor_execute',
+             lambda conn, cursor, statement, *args: statements.append(statement))
+
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+writes = [s for s in statements if not s.lstrip().upper().startswith(('SELECT', 'PRAGMA'))]
+print(json.dumps({'seconds': elapsed, 'statements': len(statements), 'writes': len(writes)}))
+"""
+
+_BOOTSTRAP_SCRIPT = """
+import json, time
+from app import app
+import bootstrap
+
+started = time.perf_counter()
+with app.app_context():
+    bootstrap.run()
+print(json.dumps({'seconds': time.perf_counter() - started}))
+"""
+
+
+def _run(script, env):
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _summary(values):
+    ordered = sorted(values)
+    return {
+        'median_ms': round(statistics.median(ordered) * 1000, 1),
+        'min_ms': round(ordered[0] * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1),
+    }
+
+
+def measure(runs, database_url=None):
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ)
+        # A scratch database unless one is given, so the benchmark never writes to real data
+        env['DATABASE_URL'] = database_url or 'sqlite:///' + os.path.join(scratch, 'boot.db')
+
+        imports = [_run(_IMPORT_SCRIPT, env) for _ in range(runs)]
+        bootstrap_first = _run(_BOOTSTRAP_SCRIPT, env)
+        bootstrap_again = _run(_BOOTSTRAP_SCRIPT, env)
+
+    return {
+        'runs': runs,
+        'import': _summary([run['seconds'] for run in imports]),
+        'statements': max(run['statements'] for run in imports),
+        'writes': max(run['writes'] for run in imports),
+        'bootstrap_ms': round(bootstrap_first['seconds'] * 1000, 1),
+        'bootstrap_again_ms': round(bootstrap_again['seconds'] * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-url', help='benchmark against this database instead of a scratch SQLite file')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs, args.database_url)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        timing = result['import']
+        print(f"import app: median {timing['median_ms']} ms "
+              f"(min {timing['min_ms']}, max {timing['max_ms']}) over {result['runs']} runs")
+        print(f"SQL during import: {result['statements']} statements, {result['writes']} writes")
+        print(f"bootstrap: {result['bootstrap_ms']} ms first run, {result['bootstrap_again_ms']} ms when up to date")
+
+    if result['statements']:
+        print('Worker startup touched the database.', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
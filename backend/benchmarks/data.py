@@ -0,0 +1,122 @@
+"""
+Synthetic catalog and order data.
+
+Generates products and orders in bulk with Core executemany, in batches
+that are committed as they go, so a million-row catalog fits in memory.
+Orders get ascending timestamps spread over the last `days` days, like real
+order history. The dashboard counters, sales rollups and category facets
+are rebuilt at the end; the search index is kept up to date by its
+triggers. The same seed gives the same data.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from models import Product, Order, OrderItem
+import facets
+import rollups
+import stats
+
+CATEGORIES = [
+    'Action Figures', 'Arts & Crafts', 'Board Games', 'Construction', 'Dolls',
+    'Educational', 'Electronics', 'Outdoor', 'Plush', 'Puzzles', 'Vehicles',
+]
+ADJECTIVES = [
+    'Amazing', 'Bright', 'Classic', 'Deluxe', 'Electric', 'Fuzzy', 'Giant',
+    'Happy', 'Magic', 'Mini', 'Rainbow', 'Super', 'Turbo', 'Wooden',
+]
+NOUNS = [
+    'Robot', 'Castle', 'Dinosaur', 'Rocket', 'Train', 'Unicorn', 'Puzzle',
+    'Racer', 'Teddy', 'Kite', 'Drone', 'Blocks', 'Pirate Ship', 'Dollhouse',
+]
+STATUSES = ['Pending', 'Processing', 'Shipped', 'Delivered', 'Cancelled']
+STATUS_WEIGHTS = [20, 10, 15, 50, 5]
+
+BATCH_SIZE = 5000
+
+
+def _batches(count, size):
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
+
+
+def _product_rows(rng, start, count):
+    rows = []
+    for number in range(start, start + count):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {number + 1}'
+        rows.append({
+            'name': name,
+            'description': f'{name} for ages {rng.randint(3, 12)} and up. '
+                           f'{rng.choice(ADJECTIVES)} fun for the whole family.',
+            'price': round(rng.uniform(2, 300), 2),
+            # Half uploaded (with responsive variants), half external links
+            'image_url': (f'/uploads/products/sha256-{number + 1:032x}.jpg' if number % 2
+                          else f'https://images.example.com/toys/{number + 1}.jpg'),
+            'category': rng.choice(CATEGORIES),
+            # Most products are in stock with room for a load test's orders
+            'stock': 0 if rng.random() < 0.05 else rng.randint(50, 1000),
+        })
+    return rows
+
+
+def generate_products(session, count, seed=0, batch_size=BATCH_SIZE):
+    """Insert `count` products. Returns [(id, price)] of the new rows."""
+    rng = random.Random(seed)
+    created = []
+    stmt = insert(Product).returning(Product.id, Product.price, sort_by_parameter_order=True)
+    for start, size in _batches(count, batch_size):
+        created.extend(tuple(row) for row in session.execute(stmt, _product_rows(rng, start, size)))
+        session.commit()
+    return created
+
+
+def generate_orders(session, count, products, seed=0, days=90, max_items=4, batch_size=BATCH_SIZE):
+    """Insert `count` orders with 1..max_items lines each, drawn from [(id, price)]."""
+    if not products:
+        raise ValueError('Orders need products; generate the catalog first')
+    rng = random.Random(seed + 1)
+    now = datetime.utcnow()
+    first = now - timedelta(days=days)
+    step = (now - first) / max(count, 1)
+    order_stmt = insert(Order).returning(Order.id, sort_by_parameter_order=True)
+
+    for start, size in _batches(count, batch_size):
+        orders, carts = [], []
+        for number in range(start, start + size):
+            cart = {}
+            for product_id, price in rng.sample(products, min(rng.randint(1, max_items), len(products))):
+                cart[product_id] = (rng.randint(1, 3), price)
+            carts.append(cart)
+            orders.append({
+                'customer_name': f'Customer {number + 1}',
+                'email': f'customer{rng.randint(1, max(count // 3, 1))}@example.com',
+                'phone': f'+1 555 {rng.randint(1000000, 9999999)}',
+                'address': f'{rng.randint(1, 9999)} Main St',
+                'city': 'Springfield',
+                'zip_code': f'{rng.randint(10000, 99999)}',
+                'total_price': round(sum(q * p for q, p in cart.values()), 2),
+                'status': rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                'created_at': first + step * number,
+            })
+
+        order_ids = session.scalars(order_stmt, orders).all()
+        session.execute(insert(OrderItem), [
+            {'order_id': order_id, 'product_id': product_id, 'quantity': quantity, 'price': price}
+            for order_id, cart in zip(order_ids, carts)
+            for product_id, (quantity, price) in cart.items()
+        ])
+        session.commit()
+
+
+def generate(session, products=1000, orders=1000, seed=0, days=90):
+    """Add a synthetic catalog and order history, then rebuild the derived tables."""
+    created = generate_products(session, products, seed=seed)
+    if orders:
+        generate_orders(session, orders, created, seed=seed, days=days)
+
+    stats.rebuild(session)
+    rollups.rebuild(session)
+    facets.rebuild(session)
+    session.commit()
+    return {'products': len(created), 'orders': orders}
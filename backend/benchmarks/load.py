@@ -0,0 +1,279 @@
+"""
+Request scenarios and the runners that drive them.
+
+ClientRunner sends requests through the Flask test client in this process
+and counts the SQL statements each request runs. GunicornRunner starts a
+local gunicorn on a free port and sends real HTTP requests from a pool of
+threads, which measures the full server stack but cannot see the queries.
+"""
+import http.cookiejar
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, select
+
+from admin_models import Admin
+from database import db
+from models import Product
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ADMIN_CREDENTIALS = {'username': 'admin', 'password': 'admin123'}
+
+# Orders only use products with plenty of stock so a run does not sell them out
+ORDER_MIN_STOCK = 100
+SAMPLE_SIZE = 200
+
+
+class Scenario:
+    """A named request; `build(samples, rng)` returns (method, path, json_body)."""
+
+    def __init__(self, name, build, admin=False):
+        self.name = name
+        self.build = build
+        self.admin = admin
+
+
+def _get(path):
+    return lambda samples, rng: ('GET', path.format(**samples), None)
+
+
+def _product_detail(samples, rng):
+    return 'GET', f"/api/products/{rng.choice(samples['product_ids'])}", None
+
+
+def _search(samples, rng):
+    return 'GET', '/api/products/search?' + urllib.parse.urlencode({'q': rng.choice(samples['terms'])}), None
+
+
+def _category_page(samples, rng):
+    return 'GET', '/api/products?' + urllib.parse.urlencode(
+        {'category': rng.choice(samples['categories']), 'sort': 'price_asc'}
+    ), None
+
+
+def _order(samples, rng):
+    product_ids = rng.sample(samples['order_product_ids'], min(2, len(samples['order_product_ids'])))
+    return 'POST', '/api/orders', {
+        'customer_name': 'Load Test',
+        'email': f'load-{uuid.uuid4().hex[:12]}@example.com',
+        'phone': '+1 555 0100',
+        'address': '1 Benchmark Way',
+        'city': 'Springfield',
+        'zip_code': '12345',
+        'items': [{'id': product_id, 'quantity': 1} for product_id in product_ids],
+    }
+
+
+SCENARIOS = [
+    Scenario('products', _get('/api/products')),
+    Scenario('products_by_category', _category_page),
+    Scenario('product_detail', _product_detail),
+    Scenario('search', _search),
+    Scenario('categories', _get('/api/categories')),
+    Scenario('settings', _get('/api/settings')),
+    Scenario('create_order', _order),
+    Scenario('admin_orders', _get('/api/admin/orders'), admin=True),
+    Scenario('admin_orders_pending', _get('/api/admin/orders?status=Pending'), admin=True),
+    Scenario('admin_dashboard', _get('/api/admin/dashboard/stats'), admin=True),
+    Scenario('admin_sales', _get('/api/admin/analytics/sales?granularity=day'), admin=True),
+    Scenario('admin_top_products', _get('/api/admin/analytics/top-products'), admin=True),
+    # Returns the whole catalog; leave it out of runs against large catalogs
+    Scenario('admin_products', _get('/api/admin/products'), admin=True),
+]
+
+
+def load_samples(session):
+    """Ids and terms the scenarios pick from, read from the benchmark database."""
+    products = session.execute(select(Product.id, Product.name, Product.stock).limit(SAMPLE_SIZE)).all()
+    if not products:
+        raise RuntimeError('The catalog is empty; generate data first')
+    categories = session.scalars(select(Product.category).distinct()).all()
+    return {
+        'product_ids': [p.id for p in products],
+        'order_product_ids': [p.id for p in products if (p.stock or 0) >= ORDER_MIN_STOCK] or [products[0].id],
+        'terms': sorted({p.name.split()[0][:4] for p in products}),
+        'categories': categories,
+    }
+
+
+class Result:
+    """Latencies in seconds and status codes of one scenario run."""
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.latencies = []
+        self.statuses = []
+        self.queries = []
+        self.elapsed = 0.0
+
+    @property
+    def errors(self):
+        return sum(1 for status in self.statuses if status >= 400)
+
+
+class ClientRunner:
+    name = 'client'
+
+    def __init__(self, app):
+        self.app = app
+        self._queries = threading.local()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self._queries.count = getattr(self._queries, 'count', 0) + 1
+
+    def __enter__(self):
+        with self.app.app_context():
+            self.engines = list(db.engines.values())
+            admin_id = db.session.scalar(select(Admin.id).limit(1))
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._count)
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as flask_session:
+            flask_session['admin_id'] = admin_id
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._count)
+
+    def request(self, method, path, body):
+        self._queries.count = 0
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, json=body)
+        response.get_data()
+        return time.perf_counter() - started, response.status_code, self._queries.count
+
+    def run(self, scenario, samples, requests, warmup, concurrency, rng):
+        # The test client runs requests one at a time in this process
+        result = Result(scenario)
+        for _ in range(warmup):
+            self.request(*scenario.build(samples, rng))
+        started = time.perf_counter()
+        for _ in range(requests):
+            latency, status, queries = self.request(*scenario.build(samples, rng))
+            result.latencies.append(latency)
+            result.statuses.append(status)
+            result.queries.append(queries)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GunicornRunner:
+    name = 'gunicorn'
+
+    def __init__(self, database_url, workers=4, threads=1, startup_timeout=30):
+        self.database_url = database_url
+        self.workers = workers
+        self.threads = threads
+        self.startup_timeout = startup_timeout
+
+    def __enter__(self):
+        port = _free_port()
+        self.base_url = f'http://127.0.0.1:{port}'
+        env = dict(os.environ, DATABASE_URL=self.database_url)
+        # Workers must share a key to accept each other's admin session cookie
+        env.setdefault('SECRET_KEY', secrets.token_hex(32))
+        # A file rather than a pipe, so a chatty server never blocks on a full buffer
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(self.workers),
+             '--threads', str(self.threads), '--bind', f'127.0.0.1:{port}', 'app:app'],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=self.log,
+        )
+        try:
+            self._wait_until_ready()
+            self.cookies = self._login()
+        except Exception:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                raise RuntimeError('gunicorn exited: ' + self.log.read().decode(errors='replace'))
+            try:
+                urllib.request.urlopen(self.base_url + '/api/settings', timeout=1).read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f'gunicorn did not answer within {self.startup_timeout} seconds')
+
+    def _login(self):
+        cookies = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+        request = urllib.request.Request(
+            self.base_url + '/api/admin/login', data=json.dumps(ADMIN_CREDENTIALS).encode(),
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        opener.open(request).read()
+        return cookies
+
+    def request(self, method, path, body):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Content-Type': 'application/json'} if data else {},
+        )
+        started = time.perf_counter()
+        try:
+            with opener.open(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        return time.perf_counter() - started, status, None
+
+    def run(self, scenario, samples, requests, warmup, concurrency, rng):
+        # Bodies are built up front so the random draws do not race between threads
+        calls = [scenario.build(samples, rng) for _ in range(warmup + requests)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda call: self.request(*call), calls[:warmup]))
+            started = time.perf_counter()
+            outcomes = list(pool.map(lambda call: self.request(*call), calls[warmup:]))
+            elapsed = time.perf_counter() - started
+
+        result = Result(scenario)
+        for latency, status, _ in outcomes:
+            result.latencies.append(latency)
+            result.statuses.append(status)
+        result.elapsed = elapsed
+        return result
+
+
+def run_scenarios(runner, scenarios, samples, requests=200, warmup=10, concurrency=1, seed=0):
+    rng = random.Random(seed)
+    return [runner.run(scenario, samples, requests, warmup, concurrency, rng) for scenario in scenarios]
@@ -0,0 +1,93 @@
+"""
+Latency summaries and baseline comparison.
+
+A baseline is the JSON written by `python -m benchmarks.run --save`. A
+scenario regresses when its p95 latency grows by more than the tolerance
+(and by at least MIN_REGRESSION_MS, so sub-millisecond noise is ignored),
+when it runs more queries per request, or when it starts returning errors.
+Query counts do not depend on the machine, so they are the most reliable
+signal in CI.
+"""
+import json
+import math
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 2.0
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(result):
+    latencies = result.latencies
+    summary = {f'p{pct}_ms': round(percentile(latencies, pct) * 1000, 2) for pct in PERCENTILES}
+    summary['mean_ms'] = round(sum(latencies) / len(latencies) * 1000, 2)
+    summary['throughput_rps'] = round(len(latencies) / result.elapsed, 1) if result.elapsed else None
+    summary['requests'] = len(latencies)
+    summary['errors'] = result.errors
+    summary['queries_per_request'] = (
+        round(sum(result.queries) / len(result.queries), 2) if result.queries else None
+    )
+    return summary
+
+
+def build_report(results, meta):
+    return {
+        'meta': meta,
+        'scenarios': {result.scenario.name: summarize(result) for result in results},
+    }
+
+
+def format_table(report):
+    header = f"{'scenario':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'errors':>8}"
+    lines = [header, '-' * len(header)]
+    for name, row in report['scenarios'].items():
+        queries = '-' if row['queries_per_request'] is None else row['queries_per_request']
+        lines.append(
+            f"{name:<24}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+            f"{row['throughput_rps']:>9}{queries:>9}{row['errors']:>8}"
+        )
+    return '\n'.join(lines)
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a list of human-readable regressions against the baseline."""
+    regressions = []
+    for name, row in report['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if old is None:
+            continue
+
+        if row['p95_ms'] > old['p95_ms'] * (1 + tolerance) and row['p95_ms'] - old['p95_ms'] >= MIN_REGRESSION_MS:
+            regressions.append(f"{name}: p95 {old['p95_ms']} ms -> {row['p95_ms']} ms")
+        if (row['queries_per_request'] is not None and old.get('queries_per_request') is not None
+                and row['queries_per_request'] > old['queries_per_request']):
+            regressions.append(
+                f"{name}: queries per request {old['queries_per_request']} -> {row['queries_per_request']}"
+            )
+        if row['errors'] and not old.get('errors'):
+            regressions.append(f"{name}: {row['errors']} errors (baseline had none)")
+
+    for key in ('products', 'orders', 'target'):
+        if baseline.get('meta', {}).get(key) != report['meta'].get(key):
+            regressions.append(
+                f"baseline was recorded with {key}={baseline.get('meta', {}).get(key)}, "
+                f"this run used {report['meta'].get(key)}"
+            )
+    return regressions
@@ -0,0 +1,153 @@
+"""
+Load-test the API against a synthetic database.
+
+    python -m benchmarks.run --products 10000 --orders 10000
+    python -m benchmarks.run --target gunicorn --workers 4 --concurrency 16
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json   # exits 1 on regressions
+
+The generated SQLite database is kept in the temp directory and reused by
+later runs with the same sizes and seed; each run works on a fresh copy of
+it, so the orders a run places do not change the next run's data.
+"""
+import argparse
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from benchmarks import data, load, report
+
+
+def _create_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    return create_app()
+
+
+def _sqlite_url(path):
+    return 'sqlite:///' + path
+
+
+def _close(db):
+    db.session.remove()
+    # Closing the last connection also checkpoints SQLite's WAL into the file
+    for engine in db.engines.values():
+        engine.dispose()
+
+
+def _populate(database_url, products, orders, seed):
+    import bootstrap
+    from database import db
+    from models import Product
+
+    app = _create_app(database_url)
+    with app.app_context():
+        bootstrap.run()
+        if db.session.scalar(select(Product.id).limit(1)) is None:
+            print(f'Generating {products} products and {orders} orders...', file=sys.stderr)
+            data.generate(db.session, products=products, orders=orders, seed=seed)
+        _close(db)
+
+
+def _template_path(args):
+    return os.path.join(
+        tempfile.gettempdir(), f'toyshop-bench-p{args.products}-o{args.orders}-s{args.seed}.db'
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the API against a synthetic database.')
+    parser.add_argument('--products', type=int, default=1000, help='catalog size (default 1000)')
+    parser.add_argument('--orders', type=int, default=1000, help='order history size (default 1000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', help='use this database (generated into if empty) instead of a SQLite copy')
+    parser.add_argument('--fresh', action='store_true', help='regenerate the cached SQLite database')
+    parser.add_argument('--target', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads (gunicorn target)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--scenario', action='append', dest='scenarios',
+                        help='run only this scenario (repeatable); default all')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare with a JSON baseline and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=report.DEFAULT_TOLERANCE,
+                        help='allowed p95 growth as a fraction (default %(default)s)')
+    args = parser.parse_args(argv)
+
+    scenarios = load.SCENARIOS
+    if args.scenarios:
+        known = {scenario.name: scenario for scenario in load.SCENARIOS}
+        unknown = [name for name in args.scenarios if name not in known]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}; choose from {', '.join(known)}")
+        scenarios = [known[name] for name in args.scenarios]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.database_url:
+            database_url = args.database_url
+            _populate(database_url, args.products, args.orders, args.seed)
+        else:
+            template = _template_path(args)
+            if args.fresh or not os.path.exists(template):
+                # Generated under another name so an interrupted run leaves no half-filled template
+                partial = os.path.join(scratch, 'template.db')
+                _populate(_sqlite_url(partial), args.products, args.orders, args.seed)
+                shutil.move(partial, template)
+            working = os.path.join(scratch, 'bench.db')
+            shutil.copyfile(template, working)
+            database_url = _sqlite_url(working)
+
+        app = _create_app(database_url)
+        from database import db
+        with app.app_context():
+            samples = load.load_samples(db.session)
+            # The copy is opened again by the runner, or by gunicorn in other processes
+            _close(db)
+
+        if args.target == 'client':
+            runner = load.ClientRunner(app)
+        else:
+            runner = load.GunicornRunner(database_url, workers=args.workers)
+        with runner:
+            results = load.run_scenarios(
+                runner, scenarios, samples, requests=args.requests, warmup=args.warmup,
+                concurrency=args.concurrency if args.target == 'gunicorn' else 1, seed=args.seed,
+            )
+
+    result = report.build_report(results, {
+        'products': args.products,
+        'orders': args.orders,
+        'seed': args.seed,
+        'target': args.target,
+        'requests': args.requests,
+        'concurrency': args.concurrency if args.target == 'gunicorn' else 1,
+        'workers': args.workers if args.target == 'gunicorn' else None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    })
+    print(report.format_table(result))
+
+    if args.save:
+        report.save(result, args.save)
+        print(f'Baseline written to {args.save}')
+
+    if args.compare:
+        regressions = report.compare(result, report.load(args.compare), args.tolerance)
+        if regressions:
+            print('\nRegressions against ' + args.compare + ':', file=sys.stderr)
+            for line in regressions:
+                print('  ' + line, file=sys.stderr)
+            return 1
+        print(f'No regressions against {args.compare}.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Serialization cost of the product lists.
+
+Times turning a page of products into JSON bytes, the way the endpoints
+did it with ORM objects, to_dict() and the standard library encoder, and
+the way they do it now with row tuples and the app's JSON provider
+(orjson when installed). The database read is included in both, so the
+difference is what hydrating models and encoding cost.
+
+    python -m benchmarks.serialization --products 5000 --page 100
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import data
+
+
+def _best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        timings.append(time.process_time() - started)
+    return min(timings)
+
+
+def measure(products, page, repeat):
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch, 'serialization.db')
+        from app import create_app
+        import bootstrap
+        from catalog import PRODUCT_FIELDS, product_columns, serialize_rows
+        from database import db
+        from models import Product
+        from sqlalchemy import select
+
+        app = create_app()
+        with app.app_context():
+            bootstrap.run()
+            data.generate(db.session, products=products, orders=0)
+
+            def orm():
+                models = db.session.scalars(select(Product).limit(page)).all()
+                json.dumps([product.to_dict() for product in models]).encode()
+                # Keep the identity map from serving the next round
+                db.session.expunge_all()
+
+            def rows():
+                result = db.session.execute(select(*product_columns(PRODUCT_FIELDS)).limit(page)).all()
+                app.json.response(serialize_rows(result, PRODUCT_FIELDS)).get_data()
+
+            orm_seconds = _best_of(orm, repeat)
+            rows_seconds = _best_of(rows, repeat)
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    return {
+        'page': page,
+        'provider': type(app.json).__module__ + ('+orjson' if _has_orjson() else ''),
+        'orm_ms': round(orm_seconds * 1000, 3),
+        'rows_ms': round(rows_seconds * 1000, 3),
+        'speedup': round(orm_seconds / rows_seconds, 1) if rows_seconds else None,
+    }
+
+
+def _has_orjson():
+    import json_provider
+    return json_provider.orjson is not None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time product list serialization.')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--page', type=int, default=100, help='products per serialized list')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    result = measure(args.products, args.page, args.repeat)
+    print(f"{result['page']} products ({result['provider']}): ORM + json {result['orm_ms']} ms, "
+          f"rows + provider {result['rows_ms']} ms ({result['speedup']}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+One-time database setup, run with `flask --app app bootstrap` before the
+workers start.
+
+Applies pending migrations, builds the search index, creates the default
+admin, the dashboard stats row, the category facets of an existing catalog
+and any missing default settings. create_app() does none of
+this, so importing the app (gunicorn workers, maintenance scripts) never
+writes to the database. Running it again is harmless: existing settings
+are left untouched.
+"""
+from sqlalchemy import select
+
+from admin_models import Admin, WebsiteSettings
+from database import db, migrate_schema, upsert_insert
+from search import create_search_index
+import facets
+import settings_cache
+import stats
+
+DEFAULT_ADMIN = {
+    'username': 'admin',
+    'email': 'admin@toywonderland.com',
+    'password': 'admin123',
+}
+
+DEFAULT_SETTINGS = {
+    'website_name': 'UNICORNKART LLC',
+    'logo_url': '',
+    'company_address': '30 N GOULD ST STE 4000, SHERIDAN, WY 82801, United States',
+    'company_ein': '38-4362997',
+    'company_phone': '+1 (555) 123-4567',
+    'company_email': 'info@unicornkart.com',
+    'privacy_policy': 'Your privacy policy content here...',
+    'terms_and_conditions': 'Your terms and conditions content here...',
+    'refund_policy': 'Your refund policy content here...',
+    'about_us': 'Welcome to UNICORNKART LLC - Your trusted source for quality toys and products!',
+    'meta_description': 'Shop the best toys and products at UNICORNKART LLC',
+    'meta_keywords': 'toys, kids toys, educational toys, fun toys, unicornkart'
+}
+
+
+def ensure_admin(session):
+    """Create the default admin unless it exists. Returns True if it was created."""
+    exists = session.scalar(
+        select(Admin.id).filter_by(username=DEFAULT_ADMIN['username'])
+    )
+    if exists is not None:
+        return False
+    admin = Admin(username=DEFAULT_ADMIN['username'], email=DEFAULT_ADMIN['email'])
+    # Hashing is deliberately slow, so it only happens when the admin is missing
+    admin.set_password(DEFAULT_ADMIN['password'])
+    session.add(admin)
+    return True
+
+
+def ensure_settings(session):
+    """Insert the missing default settings in one statement. Returns the number added."""
+    stmt = upsert_insert(session, WebsiteSettings).values([
+        {'key': key, 'value': value} for key, value in DEFAULT_SETTINGS.items()
+    ]).on_conflict_do_nothing(index_elements=['key'])
+    added = session.execute(stmt).rowcount
+    if added:
+        settings_cache.invalidate(session)
+    return added
+
+
+def run():
+    """Bring the database up to date and seed the defaults. Needs an app context."""
+    migrate_schema()
+    create_search_index(db.engine)
+
+    admin_created = ensure_admin(db.session)
+    settings_added = ensure_settings(db.session)
+    stats_created = stats.ensure(db.session)
+    facets.ensure(db.session)
+    db.session.commit()
+    return {'admin_created': admin_created, 'settings_added': settings_added,
+            'stats_created': stats_created}
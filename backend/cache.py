@@ -0,0 +1,27 @@
+"""
+Version counters for process-local caches.
+
+Every gunicorn worker keeps its own copy of cached data, tagged with the
+version it was built from. Writers bump the counter row in the same
+transaction as the change, and readers compare their copy against it with a
+single primary-key lookup, so all workers see a change as soon as it commits.
+"""
+from sqlalchemy import select, update
+
+from models import CacheVersion
+
+
+def current_version(session, name):
+    version = session.scalar(select(CacheVersion.version).where(CacheVersion.name == name))
+    return version or 0
+
+
+def bump_version(session, name):
+    """Invalidate every worker's copy of the named cache; commits with the caller's transaction."""
+    result = session.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        session.add(CacheVersion(name=name, version=1))
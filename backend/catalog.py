@@ -0,0 +1,173 @@
+"""
+Catalog queries for the public storefront API.
+
+Listing pages are served with keyset (cursor) pagination so the cost of a
+page stays the same no matter how deep into the catalog the client is, and
+only the requested columns are selected from the database.
+"""
+import base64
+import json
+
+from sqlalchemy import and_, or_, select
+
+from images import variant_urls
+from models import Product
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Columns a client may ask for through ?fields=
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'image_url', 'category', 'stock')
+
+# sort name -> (column, descending)
+SORT_ORDERS = {
+    'id': (Product.id, False),
+    'newest': (Product.id, True),
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'name': (Product.name, False),
+}
+
+
+class CatalogQueryError(ValueError):
+    """Raised when listing parameters are invalid."""
+
+
+def encode_cursor(sort_value, product_id):
+    raw = json.dumps([sort_value, product_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(product_id)
+    except (ValueError, TypeError):
+        raise CatalogQueryError('Invalid cursor')
+
+
+def parse_fields(fields):
+    if not fields:
+        return list(PRODUCT_FIELDS)
+
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise CatalogQueryError(f"Unknown fields: {', '.join(unknown)}")
+
+    # The id is always returned so clients can link to the product page
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    return requested
+
+
+def product_columns(fields):
+    return [getattr(Product, f) for f in fields]
+
+
+def serialize_rows(rows, fields):
+    """
+    Turn selected rows into product dicts, adding image variants when the
+    image is included. Rows are read as plain tuples whose leading columns
+    are `fields`, so no ORM objects are involved.
+    """
+    with_variants = 'image_url' in fields
+    products = []
+    for row in rows:
+        product = dict(zip(fields, row))
+        if with_variants:
+            product['image_variants'] = variant_urls(product['image_url'])
+        products.append(product)
+    return products
+
+
+def _parse_float(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise CatalogQueryError(f'{name} must be a number')
+
+
+def _parse_limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise CatalogQueryError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def apply_filters(stmt, args):
+    """Apply the category / price range / in-stock filters from the query string."""
+    category = args.get('category')
+    if category:
+        stmt = stmt.where(Product.category == category)
+
+    min_price = _parse_float(args, 'min_price')
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+
+    max_price = _parse_float(args, 'max_price')
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+
+    if args.get('in_stock', '').lower() in ('1', 'true', 'yes'):
+        stmt = stmt.where(Product.stock > 0)
+
+    return stmt
+
+
+def list_products(session, args):
+    """
+    Return one page of products as {'products': [...], 'next_cursor': ...}.
+
+    Supported query arguments: limit, cursor, sort, fields, category,
+    min_price, max_price and in_stock.
+    """
+    sort = args.get('sort', 'id')
+    if sort not in SORT_ORDERS:
+        raise CatalogQueryError(f"Unknown sort order: {sort}")
+    sort_column, descending = SORT_ORDERS[sort]
+
+    fields = parse_fields(args.get('fields'))
+    limit = _parse_limit(args)
+
+    columns = product_columns(fields)
+    if sort_column.key not in fields:
+        columns.append(sort_column)
+
+    stmt = apply_filters(select(*columns), args)
+
+    cursor = args.get('cursor')
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if sort_column is Product.id:
+            stmt = stmt.where(Product.id < last_id if descending else Product.id > last_id)
+        elif descending:
+            stmt = stmt.where(or_(sort_column < last_value,
+                                  and_(sort_column == last_value, Product.id < last_id)))
+        else:
+            stmt = stmt.where(or_(sort_column > last_value,
+                                  and_(sort_column == last_value, Product.id > last_id)))
+
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), Product.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), Product.id.asc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = session.execute(stmt.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    products = serialize_rows(rows, fields)
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last[sort_column.key], last['id'])
+
+    return {'products': products, 'next_cursor': next_cursor}
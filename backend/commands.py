@@ -0,0 +1,124 @@
+"""
+Maintenance commands, run with `flask --app app <command>`.
+"""
+import os
+from datetime import timedelta
+
+import click
+
+import bootstrap
+from database import db
+import facets
+import idempotency
+import image_jobs
+import images
+import query_plans
+import reservations
+import rollups
+import stats
+import upload_store
+
+
+def register_commands(app):
+    @app.cli.command('bootstrap')
+    def bootstrap_database():
+        """Apply migrations and create the default admin and settings."""
+        result = bootstrap.run()
+        if result['admin_created']:
+            click.echo(f"Default admin created - Username: {bootstrap.DEFAULT_ADMIN['username']}, "
+                       f"Password: {bootstrap.DEFAULT_ADMIN['password']}")
+        click.echo(f"Database ready ({result['settings_added']} default settings added).")
+
+    @app.cli.command('reconcile-stats')
+    def reconcile_stats():
+        """Rebuild the dashboard counters from the tables and report any drift."""
+        stored = stats.get(db.session).to_dict()
+        fresh = stats.rebuild(db.session).to_dict()
+        db.session.commit()
+
+        drift = {name: (stored[name], fresh[name]) for name in stats.COUNTERS
+                 if abs(stored[name] - fresh[name]) > 1e-6}
+        if not drift:
+            click.echo('Dashboard stats are in sync.')
+            return
+        for name, (old, new) in drift.items():
+            click.echo(f'{name}: stored {old}, actual {new} (drift {new - old:+})')
+        click.echo('Dashboard stats rebuilt.')
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups():
+        """Recompute the sales rollup tables from the order history."""
+        skipped = rollups.rebuild(db.session)
+        db.session.commit()
+        click.echo('Sales rollups rebuilt.')
+        if skipped:
+            click.echo(f'{skipped} orders without a timestamp were left out.')
+
+    @app.cli.command('rebuild-facets')
+    def rebuild_facets():
+        """Recompute the category facets from the product table."""
+        facets.rebuild(db.session)
+        db.session.commit()
+        click.echo('Category facets rebuilt.')
+
+    @app.cli.command('backfill-images')
+    def backfill_images():
+        """Generate missing responsive variants for existing product uploads."""
+        count = 0
+        for path in images.missing_variants():
+            try:
+                images.generate_variants(path, overwrite=False)
+                count += 1
+            except Exception as e:
+                click.echo(f'Skipped {os.path.basename(path)}: {e}')
+        click.echo(f'Generated variants for {count} images.')
+
+    @app.cli.command('process-image-jobs')
+    def process_image_jobs():
+        """Re-run image jobs left unfinished by a restarted worker."""
+        jobs = image_jobs.unfinished_jobs(db.session)
+        for job in jobs:
+            image_jobs.run_job(job)
+            click.echo(f'{job.id}: {job.status}')
+        click.echo(f'Processed {len(jobs)} stale image jobs.')
+
+    @app.cli.command('gc-uploads')
+    @click.option('--dry-run', is_flag=True, help='Only list the files that would be removed.')
+    @click.option('--grace-hours', default=upload_store.GC_GRACE.total_seconds() / 3600, show_default=True,
+                  help='Keep unreferenced files younger than this.')
+    def gc_uploads(dry_run, grace_hours):
+        """Delete uploaded images that no product or logo refers to."""
+        result = upload_store.collect_garbage(db.session, timedelta(hours=grace_hours), dry_run)
+        db.session.commit()
+        for url in result['removed']:
+            click.echo(url)
+        verb = 'Would remove' if dry_run else 'Removed'
+        click.echo(f"{verb} {len(result['removed'])} uploads ({result['bytes_freed']} bytes).")
+
+    @app.cli.command('prune-idempotency-keys')
+    def prune_idempotency_keys():
+        """Delete checkout idempotency keys older than 24 hours."""
+        removed = idempotency.prune(db.session)
+        db.session.commit()
+        click.echo(f'Removed {removed} idempotency keys.')
+
+    @app.cli.command('release-expired-holds')
+    def release_expired_holds():
+        """Give the stock of expired checkout reservations back."""
+        released = reservations.release_expired(db.session)
+        db.session.commit()
+        click.echo(f'Released {released} units from expired holds.')
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """Fail if a hot endpoint's SQL does a full table scan."""
+        problems = query_plans.check(app)
+        if not problems:
+            click.echo(f'{len(query_plans.HOT_ENDPOINTS)} endpoints checked, no unexpected table scans.')
+            return
+        for path, table, detail in problems:
+            if table is None:
+                click.echo(f'{path}: {detail}')
+            else:
+                click.echo(f'{path}: full scan of {table}\n    {detail}')
+        raise click.ClickException(f'{len(problems)} unexpected table scans')
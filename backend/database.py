@@ -1,7 +1,74 @@
+import os
+
+import flask_migrate
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
   pass
 
 db = SQLAlchemy(model_class=Base)
+
+# Batch mode lets migrations alter SQLite tables, which lack most ALTER TABLE forms
+migrate = Migrate(render_as_batch=True)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Databases created with db.create_all() have this table but no alembic_version
+LEGACY_MARKER_TABLE = 'product'
+
+# INSERT constructs that support ON CONFLICT upserts
+_dialect_inserts = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+def upsert_insert(session, model):
+    """Return an INSERT for the session's dialect that supports on_conflict_do_update()."""
+    return _dialect_inserts[session.get_bind().dialect.name](model.__table__)
+
+def upgrade_schema():
+    """
+    Bring existing tables up to date with the models.
+
+    db.create_all() only creates missing tables, so columns and indexes
+    added to a model later are applied here. New columns must be nullable.
+    """
+    inspector = inspect(db.engine)
+
+    with db.engine.begin() as conn:
+        preparer = conn.dialect.identifier_preparer
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {preparer.format_table(table)} '
+                    f'ADD COLUMN {preparer.format_column(column)} {column_type}'
+                ))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def migrate_schema():
+    """
+    Apply pending migrations.
+
+    Databases created by db.create_all() before migrations existed are first
+    brought up to the models with upgrade_schema() and stamped as current.
+    """
+    inspector = inspect(db.engine)
+    if inspector.has_table(LEGACY_MARKER_TABLE) and not inspector.has_table('alembic_version'):
+        db.create_all()
+        upgrade_schema()
+        flask_migrate.stamp(directory=MIGRATIONS_DIR)
+    else:
+        flask_migrate.upgrade(directory=MIGRATIONS_DIR)
@@ -0,0 +1,121 @@
+"""
+Database engine configuration.
+
+SQLite connections are tuned for several gunicorn workers sharing one file:
+WAL lets readers run while a write is in progress, busy_timeout makes a
+writer wait for the lock instead of failing with "database is locked", and
+the page cache and mmap keep hot catalog pages in memory. Catalog reads can
+optionally use a separate read-only engine (CATALOG_READ_ONLY=1), so they
+never hold a connection the write path needs.
+"""
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from database import db
+
+CATALOG_BIND = 'catalog'
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Durable across application crashes; only an OS crash can lose the last commits
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Negative sizes are in KiB: 64 MB of page cache per connection
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Read-only connections cannot change the journal mode and must not write
+READ_ONLY_PRAGMAS = {
+    **{name: value for name, value in SQLITE_PRAGMAS.items() if name != 'journal_mode'},
+    'query_only': 1,
+}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def read_only_uri(uri):
+    """URI opening the same SQLite file in read-only mode."""
+    return f'sqlite:///file:{make_url(uri).database}?mode=ro&uri=true'
+
+
+def engine_options(uri):
+    """Pool settings for the main engine."""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and not _is_sqlite_file(uri):
+        # In-memory databases use a single static connection
+        return {}
+
+    options = {
+        # Enough connections for the worker's threads; extra ones are opened on bursts
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': 30,
+    }
+    if url.get_backend_name() != 'sqlite':
+        # Server databases drop idle connections; check them before use
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = 1800
+    return options
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """Configure engines from app.config and register the app with db."""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    app.config['SQLITE_PRAGMAS'] = {
+        **SQLITE_PRAGMAS,
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', SQLITE_PRAGMAS['busy_timeout']),
+    }
+
+    read_only = os.environ.get('CATALOG_READ_ONLY', '').lower() in ('1', 'true', 'yes')
+    if read_only and _is_sqlite_file(uri):
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        binds[CATALOG_BIND] = {'url': read_only_uri(uri), **engine_options(uri)}
+
+    db.init_app(app)
+
+    with app.app_context():
+        for name, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            pragmas = app.config['SQLITE_PRAGMAS']
+            if name == CATALOG_BIND:
+                pragmas = {**READ_ONLY_PRAGMAS, 'busy_timeout': pragmas['busy_timeout']}
+            event.listen(engine, 'connect', _pragma_listener(pragmas))
+
+
+@contextmanager
+def catalog_session():
+    """
+    Session for storefront catalog reads: the read-only engine when it is
+    configured, otherwise the regular db.session.
+    """
+    engine = db.engines.get(CATALOG_BIND)
+    if engine is None:
+        yield db.session
+        return
+    with Session(engine) as session:
+        yield session
@@ -0,0 +1,71 @@
+"""
+Category facets for storefront navigation.
+
+Counts and price ranges per category live in the category_facet table.
+Writes that can change them refresh only the affected categories, each with
+an index-only aggregate over ix_product_category_price_stock, so reading
+the category list never touches the product table.
+"""
+from sqlalchemy import case, delete, func, select
+
+from database import upsert_insert
+from models import Product, CategoryFacet
+
+
+def _aggregate(session, categories=None):
+    stmt = select(
+        Product.category,
+        func.count(Product.id).label('product_count'),
+        func.coalesce(func.sum(case((Product.stock > 0, 1), else_=0)), 0).label('in_stock_count'),
+        func.min(Product.price).label('min_price'),
+        func.max(Product.price).label('max_price')
+    ).group_by(Product.category)
+    if categories is not None:
+        stmt = stmt.where(Product.category.in_(categories))
+    return [dict(row._mapping) for row in session.execute(stmt)]
+
+
+def _store(session, rows):
+    if not rows:
+        return
+    stmt = upsert_insert(session, CategoryFacet)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['category'],
+        set_={name: stmt.excluded[name] for name in rows[0] if name != 'category'}
+    )
+    session.execute(stmt, rows)
+
+
+def refresh_categories(session, categories):
+    """Recompute the facets of the given categories in the caller's transaction."""
+    categories = {c for c in categories if c}
+    if not categories:
+        return
+
+    rows = _aggregate(session, categories)
+    _store(session, rows)
+
+    emptied = categories - {row['category'] for row in rows}
+    if emptied:
+        session.execute(delete(CategoryFacet).where(CategoryFacet.category.in_(emptied)))
+
+
+def rebuild(session):
+    session.execute(delete(CategoryFacet))
+    _store(session, _aggregate(session))
+
+
+def ensure(session):
+    """Build the facets of an existing catalog that has none yet. Returns True if it did."""
+    if session.scalar(select(CategoryFacet.category).limit(1)) is not None:
+        return False
+    if session.scalar(select(Product.id).limit(1)) is None:
+        return False
+    rebuild(session)
+    return True
+
+
+def list_categories(session):
+    # Built by bootstrap and kept current by every write, never rebuilt on a read
+    facets = session.scalars(select(CategoryFacet).order_by(CategoryFacet.category)).all()
+    return [facet.to_dict() for facet in facets]
@@ -0,0 +1,30 @@
+"""
+Gunicorn settings, loaded automatically when gunicorn starts in this
+directory. Command-line options such as --workers still apply on top.
+
+With PROMETHEUS_MULTIPROC_DIR set, workers write their metrics to files
+there (see metrics.py). Files left by a previous run are removed on start,
+and the files of a worker that exits are retired so its in-flight gauge no
+longer counts.
+"""
+import glob
+import os
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    if MULTIPROC_DIR:
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if not MULTIPROC_DIR:
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,68 @@
+"""
+Idempotent checkout.
+
+Clients send an Idempotency-Key header with POST /api/orders. The key is
+inserted as the first write of the checkout transaction, so a concurrent
+duplicate blocks on the primary key until the first request commits and
+then fails its insert. The response is stored in the same transaction and
+replayed for any later request with the same key, without touching stock
+or orders again. Failed checkouts roll the key back, so the client may
+retry them with the same key.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from models import IdempotencyKey
+
+MAX_KEY_LENGTH = 100
+
+# Keys are kept long enough to cover client retries, then pruned
+KEY_TTL = timedelta(hours=24)
+
+
+class IdempotencyError(ValueError):
+    """Raised for a malformed key or a key reused with a different request."""
+
+
+def fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def validate_key(key):
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise IdempotencyError(f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} printable characters')
+    return key
+
+
+def stored_response(session, key, data):
+    """(body, status_code) of a completed request with this key, or None."""
+    row = session.get(IdempotencyKey, key)
+    if row is None or row.status_code is None:
+        return None
+    if row.request_hash != fingerprint(data):
+        raise IdempotencyError('Idempotency-Key was already used for a different request')
+    return json.loads(row.response), row.status_code
+
+
+def claim(session, key, data):
+    """
+    Insert the key in the caller's transaction. Raises IntegrityError when
+    another request with the same key committed first.
+    """
+    row = IdempotencyKey(key=key, request_hash=fingerprint(data))
+    session.add(row)
+    session.flush()
+    return row
+
+
+def record(row, body, status_code):
+    row.response = json.dumps(body)
+    row.status_code = status_code
+
+
+def prune(session, older_than=KEY_TTL):
+    cutoff = datetime.utcnow() - older_than
+    return session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
@@ -0,0 +1,129 @@
+"""
+Background image processing.
+
+Upload handlers only write the file and record an ImageJob; decoding,
+resizing and encoding of product variants run in a process pool so a batch
+of large photos does not hold a web worker. Logos are small enough to be
+optimized in the request, so their jobs are created ready. Job status lives in the database, so the admin UI can
+poll any gunicorn worker for it.
+"""
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from admin_models import ImageJob
+from database import db
+from images import UPLOAD_ROOT, process_upload
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+
+# Jobs still unfinished after this long are assumed lost with their worker
+STALE_AFTER = timedelta(minutes=10)
+
+_lock = threading.Lock()
+_executor = {'pid': None, 'pool': None}
+
+
+def _pool(app):
+    # One pool per gunicorn worker process, created on first use after the fork
+    with _lock:
+        if _executor['pid'] != os.getpid():
+            _executor['pool'] = ProcessPoolExecutor(
+                max_workers=app.config.get('IMAGE_WORKERS', DEFAULT_WORKERS)
+            )
+            _executor['pid'] = os.getpid()
+        return _executor['pool']
+
+
+def upload_path(image_url):
+    """Filesystem path of an /uploads/... URL."""
+    return os.path.join(UPLOAD_ROOT, image_url.split('/uploads/', 1)[1])
+
+
+def _set_status(job_id, status, error=None):
+    job = db.session.get(ImageJob, job_id)
+    if job is not None:
+        job.status = status
+        job.error = error
+        db.session.commit()
+
+
+def _finish(app, job_id, kind, future):
+    with app.app_context():
+        error = future.exception()
+        if error is not None:
+            logger.error('Image job %s failed: %s', job_id, error)
+            _set_status(job_id, 'failed', str(error))
+            metrics.image_job_finished(kind, 'failed')
+        else:
+            _set_status(job_id, 'ready')
+            metrics.image_job_finished(kind, 'ready', future.result())
+
+
+def create_job(session, kind, image_url, status='pending'):
+    job = ImageJob(id=secrets.token_hex(16), kind=kind, image_url=image_url, status=status)
+    session.add(job)
+    return job
+
+
+def existing_job(session, image_url):
+    """The latest job for an already stored upload that has not failed, if any."""
+    return session.scalars(
+        select(ImageJob)
+        .where(ImageJob.image_url == image_url, ImageJob.status != 'failed')
+        .order_by(ImageJob.created_at.desc())
+        .limit(1)
+    ).first()
+
+
+def is_ready(session, url_stem):
+    """True when the latest job for the upload stored at url_stem + '.<ext>' has succeeded."""
+    # A range over the indexed image_url column: '/' sorts right after '.'
+    status = session.scalar(
+        select(ImageJob.status)
+        .where(ImageJob.image_url > url_stem + '.', ImageJob.image_url < url_stem + '/')
+        .order_by(ImageJob.created_at.desc())
+        .limit(1)
+    )
+    return status == 'ready'
+
+
+def run_job(job):
+    """Process a job synchronously in this process (used by maintenance commands)."""
+    try:
+        seconds = process_upload(job.kind, upload_path(job.image_url))
+        _set_status(job.id, 'ready')
+        metrics.image_job_finished(job.kind, 'ready', seconds)
+    except Exception as e:
+        _set_status(job.id, 'failed', str(e))
+        metrics.image_job_finished(job.kind, 'failed')
+
+
+def submit(app, job):
+    """Queue a committed job on the process pool."""
+    if app.config.get('IMAGE_JOBS_INLINE'):
+        run_job(job)
+        return
+
+    job_id, kind, path = job.id, job.kind, upload_path(job.image_url)
+    _set_status(job_id, 'processing')
+    future = _pool(app).submit(process_upload, kind, path)
+    future.add_done_callback(lambda f: _finish(app, job_id, kind, f))
+
+
+def unfinished_jobs(session):
+    """Jobs that never completed, e.g. because their worker was restarted."""
+    cutoff = datetime.utcnow() - STALE_AFTER
+    return session.scalars(
+        select(ImageJob)
+        .where(ImageJob.status.in_(('pending', 'processing')), ImageJob.updated_at < cutoff)
+        .order_by(ImageJob.created_at)
+    ).all()
@@ -0,0 +1,162 @@
+"""
+Responsive image variants for product uploads.
+
+Every product image gets a fixed set of widths, each encoded as WebP with a
+JPEG fallback, stored next to the original as <name>_<variant>.<ext>.
+Product cards can then download a thumbnail-sized file instead of the full
+upload, which is kept byte for byte as uploaded.
+"""
+import io
+import os
+import re
+import time
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from PIL import Image, ImageOps
+
+UPLOAD_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+PRODUCT_IMAGE_DIR = os.path.join(UPLOAD_ROOT, 'products')
+PRODUCT_IMAGE_URL = '/uploads/products/'
+
+# variant name -> target width in pixels
+VARIANTS = {
+    'thumb': 160,
+    'card': 400,
+    'detail': 800,
+    'zoom': 1600,
+}
+
+# Logos are stored capped to this width
+MAX_LOGO_WIDTH = 500
+
+# file extension -> (Pillow format, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+VARIANT_FILE_PATTERN = re.compile(r'_(%s)\.(%s)$' % ('|'.join(VARIANTS), '|'.join(VARIANT_FORMATS)))
+
+
+def is_variant_file(filename):
+    return bool(VARIANT_FILE_PATTERN.search(filename))
+
+
+def variant_filename(filename, variant, ext):
+    stem = filename.rsplit('.', 1)[0]
+    return f'{stem}_{variant}.{ext}'
+
+
+def variant_urls(image_url):
+    """
+    Map variant name -> {'width', 'webp', 'jpg'} URLs for an uploaded image.
+    External image URLs have no variants and return an empty dict.
+    """
+    # Checked before parsing: list responses call this for every product
+    if not image_url or PRODUCT_IMAGE_URL not in image_url:
+        return {}
+    return _upload_variant_urls(image_url)
+
+
+# Shared between responses, which only serialize the result and never modify it
+@lru_cache(maxsize=4096)
+def _upload_variant_urls(image_url):
+    # The admin UI may store absolute URLs; variants are served from the same origin
+    parsed = urlsplit(image_url)
+    if not parsed.path.startswith(PRODUCT_IMAGE_URL):
+        return {}
+    base = f'{parsed.scheme}://{parsed.netloc}' if parsed.netloc else ''
+    filename = parsed.path[len(PRODUCT_IMAGE_URL):]
+
+    variants = {}
+    for variant, width in VARIANTS.items():
+        entry = {'width': width}
+        for ext in VARIANT_FORMATS:
+            entry[ext] = base + PRODUCT_IMAGE_URL + variant_filename(filename, variant, ext)
+        variants[variant] = entry
+    return variants
+
+
+def _flatten(img):
+    """RGB copy of the image; transparent areas become white for JPEG."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img.convert('RGB')
+
+
+def generate_variants(source_path, overwrite=True):
+    """Write every variant of the image at source_path; returns the files written."""
+    directory, filename = os.path.split(source_path)
+    written = []
+
+    with Image.open(source_path) as original:
+        img = _flatten(ImageOps.exif_transpose(original))
+
+        # Largest first so each smaller size is resampled from the previous one
+        for variant, width in sorted(VARIANTS.items(), key=lambda v: -v[1]):
+            if img.width > width:
+                img = img.resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+            for ext, (fmt, options) in VARIANT_FORMATS.items():
+                path = os.path.join(directory, variant_filename(filename, variant, ext))
+                if not overwrite and os.path.exists(path):
+                    continue
+                img.save(path, fmt, **options)
+                written.append(path)
+
+    return written
+
+
+def _resize_to_width(img, max_width):
+    if img.width > max_width:
+        ratio = max_width / img.width
+        img = img.resize((max_width, int(img.height * ratio)), Image.Resampling.LANCZOS)
+    return img
+
+
+def optimize_logo(source, ext):
+    """
+    Re-encode a logo capped to MAX_LOGO_WIDTH and return (data, ext).
+    Transparency is preserved by switching to PNG. Runs before the upload is
+    stored, so the stored file is named after the optimized bytes.
+    """
+    with Image.open(source) as original:
+        img = _resize_to_width(original, MAX_LOGO_WIDTH)
+        out = io.BytesIO()
+        if img.mode == 'RGBA':
+            img.save(out, 'PNG', optimize=True)
+            ext = 'png'
+        else:
+            if img.mode in ('P',):
+                img = img.convert('RGB')
+            img.save(out, Image.registered_extensions()['.' + ext], optimize=True, quality=90)
+    return out.getvalue(), ext
+
+
+def process_upload(kind, path):
+    """
+    Write the variants of a product upload. Runs in a worker process; the
+    upload itself is only read, so its bytes keep matching its content hash.
+    Returns the seconds spent.
+    """
+    started = time.perf_counter()
+    if kind == 'product':
+        generate_variants(path)
+    return time.perf_counter() - started
+
+
+def missing_variants(directory=PRODUCT_IMAGE_DIR):
+    """Yield original uploads in directory that lack at least one variant file."""
+    if not os.path.isdir(directory):
+        return
+    for filename in sorted(os.listdir(directory)):
+        if is_variant_file(filename) or '.' not in filename:
+            continue
+        for variant in VARIANTS:
+            if any(not os.path.exists(os.path.join(directory, variant_filename(filename, variant, ext)))
+                   for ext in VARIANT_FORMATS):
+                yield os.path.join(directory, filename)
+                break
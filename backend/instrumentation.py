@@ -0,0 +1,180 @@
+"""
+Per-request SQL instrumentation.
+
+Engine events time every statement a request runs. When the response is
+ready, the query count and database time go out in a Server-Timing header
+(visible in the browser's network panel) and in one JSON log line on the
+`instrumentation` logger together with the slowest statements. Statements
+slower than SLOW_QUERY_MS are also logged as warnings.
+
+Views can declare a query budget with @query_budget(n). Exceeding it is
+logged, or raises QueryBudgetExceeded when QUERY_BUDGET_ASSERT is set, so
+tests fail on a new N+1 pattern. assert_max_queries() checks a block of
+code the same way. Queries a streamed response body runs after the view
+returns are not counted.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_KEPT = 3
+# Statements are shortened in logs; the start identifies the query
+STATEMENT_LOG_LENGTH = 300
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Statements run so far in one request or assert_max_queries() block."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []  # [(seconds, statement)], slowest first
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def slowest_for_log(self):
+        return [
+            {'ms': round(seconds * 1000, 2), 'sql': ' '.join(statement.split())[:STATEMENT_LOG_LENGTH]}
+            for seconds, statement in self.slowest
+        ]
+
+
+def query_budget(limit):
+    """Declare the most SQL statements a view may run per request."""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def _active_stats():
+    stats = []
+    if has_request_context():
+        request_stats = g.get('query_stats')
+        if request_stats is not None:
+            stats.append(request_stats)
+    if has_app_context():
+        stats.extend(g.get('query_blocks', ()))
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    seconds = time.perf_counter() - started
+    for stats in _active_stats():
+        stats.record(statement, seconds)
+
+    if has_app_context() and seconds * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        logger.warning(json.dumps({
+            'event': 'slow_query',
+            'endpoint': request.endpoint if has_request_context() else None,
+            'ms': round(seconds * 1000, 2),
+            'sql': ' '.join(statement.split())[:STATEMENT_LOG_LENGTH],
+        }))
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Raise QueryBudgetExceeded if the block runs more than `limit` statements."""
+    stats = QueryStats()
+    blocks = g.setdefault('query_blocks', [])
+    blocks.append(stats)
+    try:
+        yield stats
+    finally:
+        blocks.remove(stats)
+    if stats.count > limit:
+        raise QueryBudgetExceeded(
+            f'{stats.count} queries, budget {limit}; slowest: {stats.slowest_for_log()}'
+        )
+
+
+def _start_request():
+    g.query_stats = QueryStats()
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+    db_ms = stats.seconds * 1000
+
+    response.headers.add(
+        'Server-Timing', f'db;dur={db_ms:.2f};desc="{stats.count} queries", total;dur={total_ms:.2f}'
+    )
+    logger.info(json.dumps({
+        'event': 'request',
+        'method': request.method,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'ms': round(total_ms, 2),
+        'queries': stats.count,
+        'db_ms': round(db_ms, 2),
+        'slowest': stats.slowest_for_log(),
+    }))
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        message = f'{request.endpoint} ran {stats.count} queries, budget {budget}'
+        if current_app.config['QUERY_BUDGET_ASSERT']:
+            raise QueryBudgetExceeded(f'{message}; slowest: {stats.slowest_for_log()}')
+        logger.warning(json.dumps({
+            'event': 'query_budget_exceeded',
+            'endpoint': request.endpoint,
+            'queries': stats.count,
+            'budget': budget,
+        }))
+    return response
+
+
+def _env_flag(name, default=''):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+def init_app(app):
+    """Time SQL statements on the app's engines and report them per request."""
+    app.config.setdefault('SQL_INSTRUMENTATION', _env_flag('SQL_INSTRUMENTATION', '1'))
+    app.config.setdefault('SLOW_QUERY_MS', float(os.environ.get('SLOW_QUERY_MS', 100)))
+    app.config.setdefault('QUERY_BUDGET_ASSERT', _env_flag('QUERY_BUDGET_ASSERT'))
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
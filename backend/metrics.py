@@ -0,0 +1,162 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Request latency, DB time per request, in-flight requests, image processing
+time and cache hit rates. Under gunicorn every worker is its own process,
+so set PROMETHEUS_MULTIPROC_DIR to an empty directory before starting it:
+each process then writes its values to memory-mapped files there and
+/metrics adds them up across workers (gunicorn.conf.py clears the directory
+on start and retires the files of exited workers). Without prometheus_client
+installed the recording calls do nothing and /metrics answers 503.
+
+When METRICS_TOKEN is set, /metrics requires `Authorization: Bearer <token>`.
+"""
+import hmac
+import os
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess,
+    )
+except ImportError:  # metrics are optional
+    Counter = None
+
+metrics_api = Blueprint('metrics', __name__)
+
+DB_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+IMAGE_BUCKETS = (.05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _NullMetric:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+
+if Counter is not None:
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Time to build the response',
+        ['blueprint', 'endpoint', 'method'],
+    )
+    REQUESTS = Counter(
+        'http_requests_total', 'Responses sent', ['blueprint', 'endpoint', 'method', 'status'],
+    )
+    REQUEST_DB_TIME = Histogram(
+        'http_request_db_seconds', 'Time spent in SQL statements per request',
+        ['blueprint', 'endpoint'], buckets=DB_BUCKETS,
+    )
+    IN_PROGRESS = Gauge(
+        'http_requests_in_progress', 'Requests being handled', multiprocess_mode='livesum',
+    )
+    IMAGE_PROCESSING = Histogram(
+        'image_processing_seconds', 'Time to resize an upload and write its variants',
+        ['kind'], buckets=IMAGE_BUCKETS,
+    )
+    IMAGE_JOBS = Counter('image_jobs_total', 'Finished image jobs', ['kind', 'status'])
+    CACHE_LOOKUPS = Counter('cache_lookups_total', 'Process-local cache lookups', ['cache', 'result'])
+else:
+    REQUEST_LATENCY = REQUESTS = REQUEST_DB_TIME = IN_PROGRESS = _NullMetric()
+    IMAGE_PROCESSING = IMAGE_JOBS = CACHE_LOOKUPS = _NullMetric()
+
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def image_job_finished(kind, status, seconds=None):
+    IMAGE_JOBS.labels(kind, status).inc()
+    if seconds is not None:
+        IMAGE_PROCESSING.labels(kind).observe(seconds)
+
+
+# Labelled children per (endpoint, method[, status]); labels() is the slow part of recording
+_request_children = {}
+_status_children = {}
+
+
+def _children(endpoint, method):
+    children = _request_children.get((endpoint, method))
+    if children is None:
+        blueprint = request.blueprint or ''
+        children = _request_children[(endpoint, method)] = (
+            REQUEST_LATENCY.labels(blueprint, endpoint, method),
+            REQUEST_DB_TIME.labels(blueprint, endpoint),
+        )
+    return children
+
+
+def _status_child(endpoint, method, status):
+    child = _status_children.get((endpoint, method, status))
+    if child is None:
+        child = _status_children[(endpoint, method, status)] = REQUESTS.labels(
+            request.blueprint or '', endpoint, method, str(status)
+        )
+    return child
+
+
+def _start_request():
+    if request.blueprint == metrics_api.name:
+        return
+    g.metrics_started = time.perf_counter()
+    IN_PROGRESS.inc()
+
+
+def _finish_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    endpoint, method = request.endpoint or 'unmatched', request.method
+    latency, db_time = _children(endpoint, method)
+    latency.observe(time.perf_counter() - started)
+    _status_child(endpoint, method, response.status_code).inc()
+    # Filled in by instrumentation when SQL_INSTRUMENTATION is on
+    query_stats = g.get('query_stats')
+    if query_stats is not None:
+        db_time.observe(query_stats.seconds)
+    return response
+
+
+def _end_request(exc):
+    if g.pop('metrics_started', None) is not None:
+        IN_PROGRESS.dec()
+
+
+def _registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # Collected fresh on every scrape from all workers' files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+@metrics_api.route('/metrics', methods=['GET'])
+def get_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if Counter is None:
+        return jsonify({'error': 'prometheus_client is not installed'}), 503
+    return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN', ''))
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+    app.register_blueprint(metrics_api)
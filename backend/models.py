@@ -1,4 +1,6 @@
 from database import db
+from datetime import datetime
+from images import variant_urls
 
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -9,6 +11,16 @@ class Product(db.Model):
     category = db.Column(db.String(50), nullable=False)
     stock = db.Column(db.Integer, default=0)
 
+    __table_args__ = (
+        # Category pages filter by category and sort by price; the stock column
+        # makes the category facet aggregates index-only
+        db.Index('ix_product_category_price_stock', 'category', 'price', 'stock'),
+        db.Index('ix_product_price', 'price'),
+        db.Index('ix_product_stock', 'stock'),
+        # The rowid in the index keeps sort=name pages in (name, id) order
+        db.Index('ix_product_name', 'name'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -16,6 +28,7 @@ class Product(db.Model):
             'description': self.description,
             'price': self.price,
             'image_url': self.image_url,
+            'image_variants': variant_urls(self.image_url),
             'category': self.category,
             'stock': self.stock
         }
@@ -23,18 +36,95 @@ class Product(db.Model):
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     customer_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     phone = db.Column(db.String(20), nullable=False)
     address = db.Column(db.String(200), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     zip_code = db.Column(db.String(20), nullable=False)
     total_price = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='Pending')
+    status = db.Column(db.String(20), default='Pending', index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     items = db.relationship('OrderItem', backref='order', lazy=True)
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
+    product = db.relationship('Product')
+
+class CacheVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class StoreStats(db.Model):
+    # Single row of dashboard counters, kept up to date by the writes that change them
+    id = db.Column(db.Integer, primary_key=True)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    total_orders = db.Column(db.Integer, nullable=False, default=0)
+    pending_orders = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'total_products': self.total_products,
+            'total_orders': self.total_orders,
+            'pending_orders': self.pending_orders,
+            'total_revenue': float(self.total_revenue)
+        }
+
+# Sales rollups, maintained at order time so analytics never scan the order tables
+class SalesHourly(db.Model):
+    bucket = db.Column(db.DateTime, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class SalesDaily(db.Model):
+    bucket = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class ProductSalesDaily(db.Model):
+    bucket = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class CategoryFacet(db.Model):
+    # Per-category counts and price range, refreshed by product and stock writes
+    category = db.Column(db.String(50), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    in_stock_count = db.Column(db.Integer, nullable=False, default=0)
+    min_price = db.Column(db.Float)
+    max_price = db.Column(db.Float)
+
+    def to_dict(self):
+        return {
+            'category': self.category,
+            'product_count': self.product_count,
+            'in_stock_count': self.in_stock_count,
+            'min_price': self.min_price,
+            'max_price': self.max_price
+        }
+
+class IdempotencyKey(db.Model):
+    # Checkout requests already answered, keyed by the client's Idempotency-Key header
+    key = db.Column(db.String(100), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class StockHold(db.Model):
+    # Units taken from Product.stock for a checkout in progress; given back when they expire
+    reservation_id = db.Column(db.String(32), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    # Address of the client that placed the hold, for the per-client limit
+    client = db.Column(db.String(64))
+
+    __table_args__ = (
+        db.Index('ix_stock_hold_client_expires_at', 'client', 'expires_at'),
+    )
@@ -0,0 +1,216 @@
+"""
+Order placement.
+
+Checkout does a fixed number of round trips regardless of cart size: one
+bulk read of the cart's products, one batch of conditional stock decrements
+and one multi-row insert of the order items. The decrements only succeed
+while enough stock is left, so concurrent workers can never oversell.
+
+Prices come from the same bulk read, never from the client: line prices
+and the total are computed in one pass over the cart.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from sqlalchemy import bindparam, insert, select, update
+
+from models import Product, Order, OrderItem
+import facets
+import rollups
+import stats
+
+product_table = Product.__table__
+
+CENT = Decimal('0.01')
+
+# Decrement stock only if there is enough left; run as an executemany
+decrement_stock = (
+    update(product_table)
+    .where(product_table.c.id == bindparam('product_id'))
+    .where(product_table.c.stock >= bindparam('quantity'))
+    .values(stock=product_table.c.stock - bindparam('quantity'))
+)
+
+# Give units back, e.g. from released reservations
+restore_stock_statement = (
+    update(product_table)
+    .where(product_table.c.id == bindparam('product_id'))
+    .values(stock=product_table.c.stock + bindparam('quantity'))
+)
+
+
+class OrderError(ValueError):
+    """Raised when an order request is malformed."""
+
+
+class PriceChangedError(Exception):
+    """Raised when the total the customer saw no longer matches current prices."""
+
+    def __init__(self, total, lines):
+        super().__init__('Prices have changed since the cart was loaded')
+        self.total = total
+        self.lines = lines
+
+    def to_dict(self):
+        return {
+            'error': str(self),
+            'price_changed': True,
+            'total_price': self.total,
+            'items': [{'id': pid, 'quantity': q, 'price': price} for pid, q, price in self.lines]
+        }
+
+
+class OutOfStockError(Exception):
+    """Raised when one or more cart lines cannot be fulfilled."""
+
+    def __init__(self, items):
+        super().__init__('Some items are out of stock')
+        self.items = items
+
+    def to_dict(self):
+        return {'error': str(self), 'out_of_stock': self.items}
+
+
+def cart_quantities(items):
+    """Sum quantities per product so repeated cart lines are checked together."""
+    quantities = {}
+    for item in items:
+        try:
+            product_id = int(item['id'])
+            quantity = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise OrderError('Each item needs an id and a quantity')
+        if quantity <= 0:
+            raise OrderError('Item quantities must be positive')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def fetch_products(session, quantities):
+    rows = session.execute(
+        select(Product.id, Product.name, Product.category, Product.price, Product.stock)
+        .where(Product.id.in_(quantities))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def stock_shortfall(products, quantities, held=None):
+    """List the cart lines that the given stock levels, plus any held units, cannot cover."""
+    held = held or {}
+    return [
+        {'id': row.id, 'name': row.name, 'requested': quantities[row.id],
+         'available': (row.stock or 0) + held.get(row.id, 0)}
+        for row in products.values()
+        if (row.stock or 0) + held.get(row.id, 0) < quantities[row.id]
+    ]
+
+
+def _to_cents(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def price_cart(products, quantities):
+    """Return ([(product_id, quantity, unit_price)], total) using the fetched prices."""
+    lines = []
+    total = Decimal(0)
+    for product_id, quantity in quantities.items():
+        unit_price = _to_cents(products[product_id].price)
+        lines.append((product_id, quantity, float(unit_price)))
+        total += unit_price * quantity
+    return lines, float(total)
+
+
+def take_stock(session, quantities):
+    params = [{'product_id': pid, 'quantity': q} for pid, q in quantities.items()]
+
+    if session.get_bind().dialect.supports_sane_multi_rowcount:
+        return session.execute(decrement_stock, params).rowcount
+
+    updated = 0
+    for param in params:
+        updated += session.execute(decrement_stock, param).rowcount
+    return updated
+
+
+def restore_stock(session, quantities):
+    """Add units back to stock and refresh the facets of the affected categories."""
+    if not quantities:
+        return
+    session.execute(restore_stock_statement, [
+        {'product_id': pid, 'quantity': q} for pid, q in quantities.items()
+    ])
+    facets.refresh_categories(session, session.scalars(
+        select(Product.category).where(Product.id.in_(quantities)).distinct()
+    ).all())
+
+
+def place_order(session, data, held=None):
+    """
+    Create an order and decrement stock in the caller's transaction.
+
+    `held` maps product id -> units already taken from stock by a claimed
+    reservation; only the rest of the cart is decremented and held units the
+    cart does not use are given back.
+
+    Raises OrderError for malformed requests, OutOfStockError when stock
+    ran out and PriceChangedError when the client's total_price is stale;
+    the caller is responsible for rolling back in each case.
+    """
+    held = held or {}
+    items = data.get('items') or []
+    if not items:
+        raise OrderError('Order has no items')
+    quantities = cart_quantities(items)
+
+    products = fetch_products(session, quantities)
+    unknown = sorted(set(quantities) - set(products))
+    if unknown:
+        raise OrderError(f"Unknown products: {', '.join(map(str, unknown))}")
+
+    shortfall = stock_shortfall(products, quantities, held)
+    if shortfall:
+        raise OutOfStockError(shortfall)
+
+    lines, total = price_cart(products, quantities)
+    # The client's total is only used to confirm the customer agreed to this price
+    expected = data.get('total_price')
+    if expected is not None:
+        try:
+            expected = _to_cents(expected)
+        except InvalidOperation:
+            raise OrderError('total_price must be a number')
+        if expected != _to_cents(total):
+            raise PriceChangedError(total, lines)
+
+    new_order = Order(
+        customer_name=data['customer_name'],
+        email=data['email'],
+        phone=data.get('phone', ''),
+        address=data['address'],
+        city=data['city'],
+        zip_code=data['zip_code'],
+        total_price=total
+    )
+    session.add(new_order)
+    session.flush()
+
+    to_take = {pid: q - held.get(pid, 0) for pid, q in quantities.items() if q > held.get(pid, 0)}
+    unused = {pid: q - quantities.get(pid, 0) for pid, q in held.items() if q > quantities.get(pid, 0)}
+
+    # Another checkout may have taken the stock since the read above
+    if to_take and take_stock(session, to_take) != len(to_take):
+        raise OutOfStockError(stock_shortfall(fetch_products(session, quantities), quantities, held))
+    restore_stock(session, unused)
+
+    session.execute(insert(OrderItem), [
+        {'order_id': new_order.id, 'product_id': product_id, 'quantity': quantity, 'price': price}
+        for product_id, quantity, price in lines
+    ])
+
+    stats.order_created(session, new_order)
+    rollups.record_order(session, new_order, lines)
+
+    # Only categories where a product may have sold out change their facets
+    facets.refresh_categories(session, [
+        products[pid].category for pid, q in to_take.items() if (products[pid].stock or 0) <= q
+    ])
+    return new_order
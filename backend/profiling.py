@@ -0,0 +1,168 @@
+"""
+Sampling profiler for live requests.
+
+Off unless PROFILING is set; the request hooks are not even registered
+then, so normal requests pay nothing. When on, a PROFILE_SAMPLE_RATE
+fraction of requests is profiled, plus any request from a logged-in admin
+that sends `X-Profile: 1`. While a request runs, a helper thread records
+its call stack every PROFILE_INTERVAL_MS. The samples are written in the
+folded format ("outer;inner count" per line) that flamegraph.pl,
+speedscope and inferno read, one file per request under
+PROFILE_DIR/<endpoint>/. Only the newest PROFILE_KEEP profiles per
+endpoint are kept. The admin API lists and downloads them.
+"""
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request, session
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_SUFFIX = '.folded'
+# Endpoint directories and profile ids; anything else in a path, including
+# all-dot names like '..', is rejected
+NAME_PATTERN = re.compile(r'^(?!\.+$)[\w.-]+$')
+STAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+
+
+class Sampler(threading.Thread):
+    """Counts the folded call stacks of one thread at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def fold(frame):
+    """Stack of a frame as "outermost;...;innermost" function names."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _wanted():
+    if request.endpoint is None:
+        return False
+    if request.headers.get(PROFILE_HEADER) == '1' and 'admin_id' in session:
+        return True
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+
+def _start_request():
+    if not _wanted():
+        return
+    sampler = Sampler(threading.get_ident(), current_app.config['PROFILE_INTERVAL_MS'] / 1000)
+    sampler.start()
+    g.profile_sampler = sampler
+
+
+def _end_request(exc):
+    sampler = g.pop('profile_sampler', None)
+    if sampler is None:
+        return
+    stacks = sampler.stop()
+    if stacks:
+        save(current_app.config['PROFILE_DIR'], request.endpoint, stacks,
+             current_app.config['PROFILE_KEEP'])
+
+
+def save(directory, endpoint, stacks, keep):
+    """Write folded stacks for an endpoint and drop its oldest profiles beyond `keep`."""
+    endpoint_dir = os.path.join(directory, endpoint)
+    os.makedirs(endpoint_dir, exist_ok=True)
+    profile_id = f'{datetime.utcnow().strftime(STAMP_FORMAT)}-{secrets.token_hex(4)}'
+    with open(os.path.join(endpoint_dir, profile_id + PROFILE_SUFFIX), 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+
+    # Ids start with the timestamp, so name order is age order
+    names = sorted(name for name in os.listdir(endpoint_dir) if name.endswith(PROFILE_SUFFIX))
+    for name in names[:-keep]:
+        try:
+            os.remove(os.path.join(endpoint_dir, name))
+        except FileNotFoundError:
+            pass  # another worker pruned it first
+    return profile_id
+
+
+def _describe(directory, endpoint, name):
+    path = os.path.join(directory, endpoint, name)
+    with open(path) as f:
+        samples = sum(int(line.rsplit(' ', 1)[1]) for line in f if line.strip())
+    profile_id = name[:-len(PROFILE_SUFFIX)]
+    return {
+        'endpoint': endpoint,
+        'id': profile_id,
+        'created_at': datetime.strptime(profile_id.split('-')[0], STAMP_FORMAT).isoformat(),
+        'samples': samples,
+        'bytes': os.path.getsize(path),
+    }
+
+
+def list_profiles(directory, endpoint=None):
+    """Stored profiles, newest first, optionally for one endpoint."""
+    if not os.path.isdir(directory):
+        return []
+    endpoints = [endpoint] if endpoint else sorted(os.listdir(directory))
+    profiles = []
+    for name in endpoints:
+        endpoint_dir = os.path.join(directory, name)
+        if not NAME_PATTERN.match(name) or not os.path.isdir(endpoint_dir):
+            continue
+        for filename in os.listdir(endpoint_dir):
+            if filename.endswith(PROFILE_SUFFIX):
+                try:
+                    profiles.append(_describe(directory, name, filename))
+                except (FileNotFoundError, ValueError, IndexError):
+                    continue  # pruned meanwhile, or not one of ours
+    profiles.sort(key=lambda profile: profile['id'], reverse=True)
+    return profiles
+
+
+def profile_path(directory, endpoint, profile_id):
+    """Path of a stored profile, or None for unknown or malformed names."""
+    if not NAME_PATTERN.match(endpoint) or not NAME_PATTERN.match(profile_id):
+        return None
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, endpoint, profile_id + PROFILE_SUFFIX))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def init_app(app):
+    enabled = os.environ.get('PROFILING', '').lower() in ('1', 'true', 'yes')
+    app.config.setdefault('PROFILING', enabled)
+    app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.environ.get('PROFILE_SAMPLE_RATE', 0)))
+    app.config.setdefault('PROFILE_INTERVAL_MS', float(os.environ.get('PROFILE_INTERVAL_MS', 2)))
+    app.config.setdefault('PROFILE_KEEP', int(os.environ.get('PROFILE_KEEP', 20)))
+    app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR', DEFAULT_DIR))
+    if not app.config['PROFILING']:
+        return
+    app.before_request(_start_request)
+    app.teardown_request(_end_request)
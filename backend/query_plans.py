@@ -0,0 +1,149 @@
+"""
+Query plan checks for the hot endpoints.
+
+Each endpoint is requested through the test client while the SQL it runs is
+recorded, then every SELECT is EXPLAINed. A full table scan that the
+endpoint is not expected to do is reported, so a dropped index or a
+rewritten query that no longer uses one is caught before it reaches a large
+catalog. Queries only run when there is data for them (order items need
+orders), so check against a seeded database. Run with
+`flask check-query-plans`; tests/test_query_plans.py runs it on generated data.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import event, select
+
+from admin_models import Admin
+from catalog import encode_cursor
+from database import db
+from models import Product
+
+# (path, tables the endpoint may scan in full). Paths are formatted with the
+# sample values from _samples().
+HOT_ENDPOINTS = [
+    # Unfiltered pages walk the primary key and stop at the page size
+    ('/api/products', {'product'}),
+    ('/api/products?sort=newest&cursor={id_cursor}', {'product'}),
+    ('/api/products?sort=price_asc', ()),
+    ('/api/products?sort=price_desc&cursor={price_cursor}', ()),
+    ('/api/products?sort=name', ()),
+    ('/api/products?category={category}', ()),
+    ('/api/products?category={category}&sort=price_asc&min_price=1&max_price=1000', ()),
+    ('/api/products?in_stock=1&sort=price_asc', ()),
+    ('/api/products/{product_id}', ()),
+    ('/api/products/search?q={term}', ()),
+    ('/api/products/search?q={term}&typeahead=1', ()),
+    ('/api/categories', ()),
+    ('/api/settings', ()),
+    ('/api/admin/orders', {'order'}),
+    ('/api/admin/orders?status=Pending', ()),
+    # created_at grows with the id, so walking the primary key back stops at the page size
+    ('/api/admin/orders?date_from={today}', {'order'}),
+    ('/api/admin/orders/export?format=ndjson&date_from={today}', ()),
+    ('/api/admin/dashboard/stats', ()),
+    ('/api/admin/analytics/sales?granularity=day', ()),
+    ('/api/admin/analytics/sales?granularity=hour', ()),
+    ('/api/admin/analytics/top-products', ()),
+]
+
+# Tables that only ever hold a handful of rows and are read whole
+SMALL_TABLES = {'website_settings', 'category_facet', 'store_stats', 'cache_version', 'alembic_version'}
+
+SCAN_PATTERNS = {
+    # SQLite: "SCAN product" is a full scan, "SCAN product USING INDEX ..." is not;
+    # an AUTOMATIC index is built from a full scan on every execution
+    'sqlite': re.compile(r'^(?:SCAN (\w+)(?: AS \w+)?$|SEARCH (\w+) USING AUTOMATIC)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def _samples(session):
+    product = session.execute(
+        select(Product.id, Product.name, Product.category, Product.price).limit(1)
+    ).first()
+    if product is None:
+        raise RuntimeError('The catalog is empty; seed some products first')
+    return {
+        'product_id': product.id,
+        'category': product.category,
+        'term': product.name.split()[0][:3],
+        'id_cursor': encode_cursor(product.id, product.id),
+        'price_cursor': encode_cursor(product.price, product.id),
+        'today': date.today().isoformat(),
+    }
+
+
+def _explain(connection, statement, parameters):
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in rows]
+    # PostgreSQL rightly prefers sequential scans of small tables; with them
+    # disabled a Seq Scan is only planned when no index can serve the query
+    with connection.begin():
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).all()
+    return [row[0] for row in rows]
+
+
+def full_scans(connection, statement, parameters):
+    """Tables the statement reads in full; scans of subquery results are not counted."""
+    pattern = SCAN_PATTERNS[connection.dialect.name]
+    scans = set()
+    for line in _explain(connection, statement, parameters):
+        match = pattern.search(line.strip())
+        if not match:
+            continue
+        # ORM aliases such as product_1 stand for their table
+        table = re.sub(r'_\d+$', '', next(name for name in match.groups() if name))
+        if table in db.metadata.tables:
+            scans.add(table)
+    return scans
+
+
+def check(app):
+    """
+    Request every hot endpoint and return a list of (path, table, sql) for
+    the unexpected full scans.
+    """
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((conn.engine, statement, parameters))
+
+    with app.app_context():
+        samples = _samples(db.session)
+        admin_id = db.session.scalar(select(Admin.id).limit(1))
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['admin_id'] = admin_id
+
+    problems = []
+    try:
+        for path, allowed in HOT_ENDPOINTS:
+            path = path.format(**samples)
+            # The first request may fill caches or rebuild derived tables
+            client.get(path).get_data()
+            captured.clear()
+            response = client.get(path)
+            response.get_data()
+            if response.status_code != 200:
+                problems.append((path, None, f'HTTP {response.status_code}'))
+                continue
+
+            for engine, statement, parameters in list(captured):
+                with engine.connect() as connection:
+                    scans = full_scans(connection, statement, parameters)
+                for table in sorted(scans - set(allowed) - SMALL_TABLES):
+                    problems.append((path, table, ' '.join(statement.split())))
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return problems
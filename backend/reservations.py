@@ -0,0 +1,206 @@
+"""
+Stock reservations for checkout.
+
+Starting checkout places a hold on the cart: the units are taken from
+Product.stock right away with the same conditional decrement orders use,
+so the listing's stock is always the quantity still available to sell and
+nobody reaches payment for items that are already gone. Placing the order
+claims the hold; holds that are neither claimed nor released expire and
+are given back by a sweeper thread that each worker starts when it creates
+the app (or by `flask release-expired-holds`). RESERVATION_SWEEPER=0 turns
+it off, e.g. for tests.
+
+Claiming and releasing both delete the hold rows with DELETE ... RETURNING,
+so a hold is converted or given back exactly once even when the sweeper
+and a checkout race.
+
+Anyone can start a checkout, so holds are bounded: a reservation covers at
+most MAX_HOLD_LINES products and holds at most MAX_HOLD_QUANTITY units of
+each (the order takes any extra units from stock), and a client may keep
+only MAX_ACTIVE_RESERVATIONS unexpired reservations at a time.
+
+Because held units are already out of Product.stock, the admin API shows
+and edits the on-hand stock: Product.stock plus every unit still held.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from database import db
+from models import Product, StockHold
+from orders import (OrderError, OutOfStockError, cart_quantities, fetch_products,
+                    stock_shortfall, take_stock, restore_stock)
+import facets
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_TTL = timedelta(minutes=10)
+SWEEP_INTERVAL = 30
+MAX_AVAILABILITY_IDS = 200
+MAX_HOLD_LINES = 50
+MAX_HOLD_QUANTITY = 10
+MAX_ACTIVE_RESERVATIONS = 5
+
+_lock = threading.Lock()
+_sweeper = {'pid': None}
+
+
+class TooManyReservationsError(Exception):
+    """Raised when a client already holds MAX_ACTIVE_RESERVATIONS reservations."""
+
+    def __init__(self):
+        super().__init__('Too many checkouts in progress; finish or cancel one first')
+
+
+def active_reservations(session, client, now=None):
+    """Number of unexpired reservations placed by a client."""
+    return session.scalar(
+        select(func.count(func.distinct(StockHold.reservation_id)))
+        .where(StockHold.client == client, StockHold.expires_at > (now or datetime.utcnow()))
+    )
+
+
+def reserve(session, items, client=None, ttl=RESERVATION_TTL):
+    """
+    Hold stock for the cart in the caller's transaction and return
+    (reservation_id, expires_at, quantities), with quantities capped at
+    MAX_HOLD_QUANTITY. Raises OrderError or OutOfStockError like
+    place_order, and TooManyReservationsError when `client` is at its limit.
+    """
+    requested = cart_quantities(items)
+    if not requested:
+        raise OrderError('Reservation has no items')
+    if len(requested) > MAX_HOLD_LINES:
+        raise OrderError(f'A reservation can hold at most {MAX_HOLD_LINES} products')
+    if client is not None and active_reservations(session, client) >= MAX_ACTIVE_RESERVATIONS:
+        raise TooManyReservationsError()
+
+    products = fetch_products(session, requested)
+    unknown = sorted(set(requested) - set(products))
+    if unknown:
+        raise OrderError(f"Unknown products: {', '.join(map(str, unknown))}")
+
+    # The whole cart must be in stock, but only part of a large line is held
+    shortfall = stock_shortfall(products, requested)
+    if shortfall:
+        raise OutOfStockError(shortfall)
+    quantities = {pid: min(q, MAX_HOLD_QUANTITY) for pid, q in requested.items()}
+    if take_stock(session, quantities) != len(quantities):
+        raise OutOfStockError(stock_shortfall(fetch_products(session, requested), requested))
+
+    reservation_id = secrets.token_hex(16)
+    expires_at = datetime.utcnow() + ttl
+    session.execute(insert(StockHold), [
+        {'reservation_id': reservation_id, 'product_id': pid, 'quantity': q,
+         'expires_at': expires_at, 'client': client}
+        for pid, q in quantities.items()
+    ])
+
+    facets.refresh_categories(session, [
+        products[pid].category for pid, q in quantities.items() if (products[pid].stock or 0) <= q
+    ])
+    return reservation_id, expires_at, quantities
+
+
+def _take_holds(session, *conditions):
+    rows = session.execute(
+        delete(StockHold).where(*conditions).returning(StockHold.product_id, StockHold.quantity)
+    ).all()
+    taken = {}
+    for product_id, quantity in rows:
+        taken[product_id] = taken.get(product_id, 0) + quantity
+    return taken
+
+
+def claim(session, reservation_id):
+    """
+    Remove an unexpired reservation's holds and return {product_id: units}
+    for place_order; an unknown or expired reservation claims nothing.
+    """
+    if not reservation_id:
+        return {}
+    return _take_holds(session, StockHold.reservation_id == reservation_id,
+                       StockHold.expires_at > datetime.utcnow())
+
+
+def release(session, reservation_id):
+    """Give a reservation's units back to stock; returns the number of units released."""
+    released = _take_holds(session, StockHold.reservation_id == reservation_id)
+    restore_stock(session, released)
+    return sum(released.values())
+
+
+def release_expired(session, now=None):
+    """Give the units of every expired hold back to stock; returns the number of units released."""
+    released = _take_holds(session, StockHold.expires_at <= (now or datetime.utcnow()))
+    restore_stock(session, released)
+    return sum(released.values())
+
+
+def held_units():
+    """Subquery of (product_id, units) still held, expired or not, per product."""
+    return (
+        select(StockHold.product_id, func.sum(StockHold.quantity).label('units'))
+        .group_by(StockHold.product_id)
+        .subquery()
+    )
+
+
+def held_units_of(product_id):
+    """Scalar subquery of the units still held for one product."""
+    return (
+        select(func.coalesce(func.sum(StockHold.quantity), 0))
+        .where(StockHold.product_id == product_id)
+        .scalar_subquery()
+    )
+
+
+def held_for(session, product_id):
+    return session.scalar(select(held_units_of(product_id)))
+
+
+def drop_product_holds(session, product_id):
+    """Delete a product's holds before the product itself; returns the units they held."""
+    return sum(_take_holds(session, StockHold.product_id == product_id).values())
+
+
+def availability(session, product_ids):
+    """Map product id -> units available to sell for a batch of products."""
+    rows = session.execute(
+        select(Product.id, Product.stock).where(Product.id.in_(product_ids[:MAX_AVAILABILITY_IDS]))
+    ).all()
+    return {row.id: max(row.stock or 0, 0) for row in rows}
+
+
+def _sweep(app):
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        with app.app_context():
+            try:
+                released = release_expired(db.session)
+                db.session.commit()
+                if released:
+                    logger.info('Released %s units from expired stock holds', released)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Releasing expired stock holds failed')
+
+
+def start_sweeper(app):
+    """Start the expired-hold sweeper once per worker process; later calls do nothing."""
+    with _lock:
+        if _sweeper['pid'] == os.getpid() or not app.config['RESERVATION_SWEEPER']:
+            return
+        threading.Thread(target=_sweep, args=(app,), name='stock-hold-sweeper', daemon=True).start()
+        _sweeper['pid'] = os.getpid()
+
+
+def init_app(app):
+    enabled = os.environ.get('RESERVATION_SWEEPER', '1').lower() in ('1', 'true', 'yes')
+    app.config.setdefault('RESERVATION_SWEEPER', enabled)
+    start_sweeper(app)
@@ -0,0 +1,158 @@
+"""
+Pre-aggregated sales rollups.
+
+Every order adds to hourly and daily revenue buckets and to per-product
+daily unit counts in the same transaction that creates it. The analytics
+endpoints read only these tables, so charting a year costs at most a few
+hundred rows regardless of order volume.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from database import upsert_insert
+from models import Product, Order, OrderItem, SalesHourly, SalesDaily, ProductSalesDaily
+
+GRANULARITIES = {
+    'hour': SalesHourly,
+    'day': SalesDaily,
+}
+
+# Default look-back window per granularity
+DEFAULT_RANGES = {
+    'hour': timedelta(hours=48),
+    'day': timedelta(days=30),
+}
+
+
+def _upsert_increment(session, model, key_columns, rows):
+    """Insert rows, or add their value columns onto existing rows with the same key."""
+    if not rows:
+        return
+
+    table = model.__table__
+    stmt = upsert_insert(session, model)
+    value_columns = [name for name in rows[0] if name not in key_columns]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={name: table.c[name] + stmt.excluded[name] for name in value_columns}
+    )
+    session.execute(stmt, rows)
+
+
+def hour_bucket(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def record_order(session, order, lines):
+    """
+    Add an order to the rollups. `lines` is an iterable of
+    (product_id, quantity, unit_price) tuples.
+    """
+    created_at = order.created_at or datetime.utcnow()
+    revenue = order.total_price
+
+    _upsert_increment(session, SalesHourly, ['bucket'], [
+        {'bucket': hour_bucket(created_at), 'order_count': 1, 'revenue': revenue}
+    ])
+    _upsert_increment(session, SalesDaily, ['bucket'], [
+        {'bucket': created_at.date(), 'order_count': 1, 'revenue': revenue}
+    ])
+
+    per_product = {}
+    for product_id, quantity, price in lines:
+        units, amount = per_product.get(product_id, (0, 0))
+        per_product[product_id] = (units + quantity, amount + quantity * price)
+
+    _upsert_increment(session, ProductSalesDaily, ['bucket', 'product_id'], [
+        {'bucket': created_at.date(), 'product_id': product_id, 'units': units, 'revenue': amount}
+        for product_id, (units, amount) in per_product.items()
+    ])
+
+
+def _day_bounds(start, end):
+    """Daily buckets overlapping [start, end)."""
+    end_day = end.date()
+    if end.time() != datetime.min.time():
+        end_day += timedelta(days=1)
+    return start.date(), end_day
+
+
+def sales_series(session, granularity, start, end):
+    model = GRANULARITIES[granularity]
+    if granularity == 'day':
+        start, end = _day_bounds(start, end)
+
+    rows = session.execute(
+        select(model.bucket, model.order_count, model.revenue)
+        .where(model.bucket >= start, model.bucket < end)
+        .order_by(model.bucket)
+    ).all()
+    return [
+        {'bucket': row.bucket.isoformat(), 'orders': row.order_count, 'revenue': row.revenue}
+        for row in rows
+    ]
+
+
+def top_products(session, start, end, limit):
+    start, end = _day_bounds(start, end)
+    units = func.sum(ProductSalesDaily.units).label('units')
+    revenue = func.sum(ProductSalesDaily.revenue).label('revenue')
+    top = (
+        select(ProductSalesDaily.product_id, units, revenue)
+        .where(ProductSalesDaily.bucket >= start, ProductSalesDaily.bucket < end)
+        .group_by(ProductSalesDaily.product_id)
+        .order_by(units.desc())
+        .limit(limit)
+        .subquery()
+    )
+    rows = session.execute(
+        select(top.c.product_id, Product.name, top.c.units, top.c.revenue)
+        .outerjoin(Product, Product.id == top.c.product_id)
+        .order_by(top.c.units.desc())
+    ).all()
+    return [
+        {'product_id': row.product_id, 'name': row.name or 'Unknown',
+         'units': row.units, 'revenue': row.revenue}
+        for row in rows
+    ]
+
+
+def rebuild(session):
+    """
+    Recompute all rollups from the order tables. Returns the number of
+    orders skipped because they predate order timestamps.
+    """
+    for model in (SalesHourly, SalesDaily, ProductSalesDaily):
+        session.execute(delete(model))
+
+    orders = session.execute(
+        select(Order.id, Order.created_at, Order.total_price)
+        .where(Order.created_at.is_not(None))
+        .order_by(Order.id)
+        .execution_options(yield_per=1000)
+    )
+    hourly, daily = {}, {}
+    for order in orders:
+        for buckets, key in ((hourly, hour_bucket(order.created_at)), (daily, order.created_at.date())):
+            count, amount = buckets.get(key, (0, 0))
+            buckets[key] = (count + 1, amount + order.total_price)
+
+    products = {}
+    items = session.execute(
+        select(Order.created_at, OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.created_at.is_not(None))
+        .execution_options(yield_per=1000)
+    )
+    for item in items:
+        key = (item.created_at.date(), item.product_id)
+        units, amount = products.get(key, (0, 0))
+        products[key] = (units + item.quantity, amount + item.quantity * item.price)
+
+    session.add_all(SalesHourly(bucket=k, order_count=c, revenue=r) for k, (c, r) in hourly.items())
+    session.add_all(SalesDaily(bucket=k, order_count=c, revenue=r) for k, (c, r) in daily.items())
+    session.add_all(ProductSalesDaily(bucket=day, product_id=pid, units=u, revenue=r)
+                    for (day, pid), (u, r) in products.items())
+
+    return session.scalar(select(func.count(Order.id)).where(Order.created_at.is_(None)))
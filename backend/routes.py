@@ -1,60 +1,175 @@
-from flask import Blueprint, jsonify, request
-from models import Product, Order, OrderItem
+from flask import Blueprint, abort, jsonify, request, current_app
+from models import Product
 from database import db
+from db_config import catalog_session
+from instrumentation import query_budget
+from catalog import list_products, product_columns, serialize_rows, CatalogQueryError, PRODUCT_FIELDS
+from search import search_products, DEFAULT_SEARCH_LIMIT
+from orders import place_order, OutOfStockError, PriceChangedError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+import facets
+import idempotency
+import reservations
+import settings_cache
 
 api = Blueprint('api', __name__)
 
 @api.route('/products', methods=['GET'])
+@query_budget(2)
 def get_products():
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    try:
+        with catalog_session() as session:
+            page = list_products(session, request.args)
+    except CatalogQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page)
+
+@api.route('/products/search', methods=['GET'])
+@query_budget(2)
+def search_catalog():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query'}), 400
+
+    try:
+        with catalog_session() as session:
+            results = search_products(
+                session, query,
+                limit=request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int),
+                offset=request.args.get('offset', 0, type=int),
+                fields=request.args.get('fields'),
+                typeahead=request.args.get('typeahead', '').lower() in ('1', 'true', 'yes')
+            )
+    except CatalogQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(results)
 
 @api.route('/products/<int:id>', methods=['GET'])
+@query_budget(1)
 def get_product(id):
-    product = Product.query.get_or_404(id)
-    return jsonify(product.to_dict())
+    with catalog_session() as session:
+        row = session.execute(select(*product_columns(PRODUCT_FIELDS)).where(Product.id == id)).first()
+    if row is None:
+        abort(404)
+    return jsonify(serialize_rows([row], PRODUCT_FIELDS)[0])
+
+def _replay(body, status_code):
+    return jsonify(body), status_code, {'Idempotent-Replayed': 'true'}
 
 @api.route('/orders', methods=['POST'])
+# Worst case: a keyed first order that claims a partly used hold and sells out a category
+@query_budget(18)
 def create_order():
     data = request.json
-    
+    key = request.headers.get('Idempotency-Key')
+
     try:
-        new_order = Order(
-            customer_name=data['customer_name'],
-            email=data['email'],
-            phone=data.get('phone', ''),
-            address=data['address'],
-            city=data['city'],
-            zip_code=data['zip_code'],
-            total_price=data['total_price']
+        claimed = None
+        if key is not None:
+            idempotency.validate_key(key)
+            stored = idempotency.stored_response(db.session, key, data)
+            if stored is not None:
+                return _replay(*stored)
+            # End the read so the key insert below starts the write transaction
+            db.session.rollback()
+            try:
+                claimed = idempotency.claim(db.session, key, data)
+            except IntegrityError:
+                # A concurrent request with the same key committed first
+                db.session.rollback()
+                stored = idempotency.stored_response(db.session, key, data)
+                if stored is None:
+                    return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+                return _replay(*stored)
+
+        # Units held for this checkout were already taken from stock
+        held = reservations.claim(db.session, data.get('reservation_id'))
+        new_order = place_order(db.session, data, held=held)
+        body = {'message': 'Order placed successfully', 'order_id': new_order.id,
+                'total_price': new_order.total_price}
+        if claimed is not None:
+            idempotency.record(claimed, body, 201)
+        db.session.commit()
+        return jsonify(body), 201
+    except idempotency.IdempotencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 422
+    except (OutOfStockError, PriceChangedError) as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/products/availability', methods=['GET'])
+@query_budget(1)
+def get_availability():
+    # Units available to sell for a batch of products: ?ids=1,2,3
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma separated list of integers'}), 400
+    with catalog_session() as session:
+        available = reservations.availability(session, ids)
+    return jsonify({str(pid): units for pid, units in available.items()})
+
+@api.route('/reservations', methods=['POST'])
+# Worst case: the hold sells out a category
+@query_budget(6)
+def create_reservation():
+    data = request.json or {}
+
+    try:
+        reservation_id, expires_at, quantities = reservations.reserve(
+            db.session, data.get('items') or [], client=request.remote_addr
         )
-        
-        db.session.add(new_order)
-        db.session.flush()
-
-        for item in data['items']:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item['id'],
-                quantity=item['quantity'],
-                price=item['price']
-            )
-            db.session.add(order_item)
-            
-            product = Product.query.get(item['id'])
-            if product:
-                product.stock -= item['quantity']
+        db.session.commit()
+    except reservations.TooManyReservationsError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 429
+    except OutOfStockError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    # Started with the app; this only covers a worker forked from a preloaded app
+    reservations.start_sweeper(current_app._get_current_object())
+    return jsonify({
+        'reservation_id': reservation_id,
+        'expires_at': expires_at.isoformat(),
+        'items': [{'id': pid, 'quantity': q} for pid, q in quantities.items()]
+    }), 201
 
+@api.route('/reservations/<reservation_id>', methods=['DELETE'])
+def release_reservation(reservation_id):
+    try:
+        released = reservations.release(db.session, reservation_id)
         db.session.commit()
-        return jsonify({'message': 'Order placed successfully', 'order_id': new_order.id}), 201
+        return jsonify({'released': released}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@api.route('/categories', methods=['GET'])
+@query_budget(1)
+def get_categories():
+    return jsonify(facets.list_categories(db.session))
+
 # Public endpoint for website settings (no authentication required)
 @api.route('/settings', methods=['GET'])
+@query_budget(2)
 def get_public_settings():
-    from admin_models import WebsiteSettings
-    settings = WebsiteSettings.query.all()
-    settings_dict = {setting.key: setting.value for setting in settings}
-    return jsonify(settings_dict), 200
+    keys = request.args.get('keys')
+    if keys is not None:
+        keys = [key.strip() for key in keys.split(',') if key.strip()]
+
+    body, etag = settings_cache.get_response(db.session, keys)
+
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the response but must revalidate it with If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
@@ -0,0 +1,124 @@
+"""
+Full-text product search.
+
+On SQLite the catalog is indexed by an FTS5 table over product name,
+description and category. It is an external-content index kept in sync by
+triggers on the product table, so every writer (the admin API, seed.py,
+maintenance scripts) updates it in the same transaction as the product row.
+Other databases fall back to a LIKE scan.
+"""
+import re
+
+from sqlalchemy import column, func, or_, select, table, text
+
+from models import Product
+from catalog import parse_fields, product_columns, serialize_rows
+
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+MAX_SEARCH_OFFSET = 1000
+
+product_fts = table('product_fts', column('rowid'), column('product_fts'))
+
+# Column weights for bm25() (name, description, category); lower scores rank first
+RANK = func.bm25(product_fts.c.product_fts, 10.0, 1.0, 4.0)
+
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE product_fts USING fts5(
+        name, description, category,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER product_fts_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+    """CREATE TRIGGER product_fts_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END""",
+    """CREATE TRIGGER product_fts_update AFTER UPDATE OF name, description, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+]
+
+
+def uses_fts(bind):
+    return bind.dialect.name == 'sqlite'
+
+
+def create_search_index(engine):
+    """Create the FTS index and its triggers if missing, indexing existing products."""
+    if not uses_fts(engine):
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'"
+        )).first()
+        if exists:
+            return
+        for statement in SEARCH_INDEX_DDL:
+            conn.exec_driver_sql(statement)
+
+
+def match_expression(query):
+    """
+    Turn user input into an FTS5 query: every word must match, and each word
+    also matches as a prefix so results update while the user is typing.
+    """
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_products(session, query, limit=DEFAULT_SEARCH_LIMIT, offset=0, fields=None, typeahead=False):
+    fields = parse_fields(fields)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    offset = max(0, min(offset, MAX_SEARCH_OFFSET))
+
+    columns = product_columns(fields)
+    if uses_fts(session.get_bind()):
+        expression = match_expression(query)
+        if not expression:
+            return {'products': [], 'next_offset': None}
+        if typeahead:
+            offset = 0
+        # Rank and page inside the index, so only the returned rows are joined to product
+        hits = (
+            select(product_fts.c.rowid, RANK.label('score'))
+            .where(product_fts.c.product_fts.op('MATCH')(expression))
+            .order_by(RANK, product_fts.c.rowid)
+            .limit(limit + 1)
+            .offset(offset)
+            .subquery()
+        )
+        stmt = (
+            select(*columns)
+            .select_from(hits)
+            .join(Product, Product.id == hits.c.rowid)
+            .order_by(hits.c.score, Product.id)
+        )
+    else:
+        words = re.findall(r'\w+', query)
+        if not words:
+            return {'products': [], 'next_offset': None}
+        stmt = select(*columns).order_by(Product.name, Product.id)
+        for word in words:
+            pattern = f'%{word}%'
+            stmt = stmt.where(or_(Product.name.ilike(pattern),
+                                  Product.category.ilike(pattern),
+                                  Product.description.ilike(pattern)))
+        stmt = stmt.limit(limit + 1).offset(offset)
+
+    rows = session.execute(stmt).all()
+    has_more = len(rows) > limit
+    products = serialize_rows(rows[:limit], fields)
+
+    return {
+        'products': products,
+        'next_offset': offset + limit if has_more and not typeahead and offset + limit <= MAX_SEARCH_OFFSET else None
+    }
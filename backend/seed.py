@@ -1,7 +1,11 @@
-from app import create_app, db
-from models import Product
+import argparse
 
-app = create_app()
+from app import app, db
+from benchmarks import data
+import bootstrap
+import facets
+from models import Product
+import stats
 
 toys = [
     {
@@ -102,13 +106,26 @@ toys = [
     }
 ]
 
+parser = argparse.ArgumentParser(description='Seed the database with the sample toys or a synthetic catalog.')
+parser.add_argument('--products', type=int, default=0,
+                    help='generate this many synthetic products instead of the sample toys')
+parser.add_argument('--orders', type=int, default=0, help='synthetic orders to generate with them')
+parser.add_argument('--seed', type=int, default=0, help='random seed for the synthetic data')
+args = parser.parse_args()
+
 with app.app_context():
-    db.create_all()
+    bootstrap.run()
+    if args.products:
+        counts = data.generate(db.session, products=args.products, orders=args.orders, seed=args.seed)
+        print(f"Generated {counts['products']} products and {counts['orders']} orders.")
     # Check if products exist
-    if Product.query.count() == 0:
+    elif Product.query.count() == 0:
         for toy_data in toys:
             toy = Product(**toy_data)
             db.session.add(toy)
+        # bootstrap set up the counters and facets for the empty catalog
+        stats.rebuild(db.session)
+        facets.rebuild(db.session)
         db.session.commit()
         print("Database seeded successfully!")
     else:
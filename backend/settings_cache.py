@@ -0,0 +1,72 @@
+"""
+Cache for the public /api/settings endpoint.
+
+The settings are read from the database only when their version counter
+changes. Serialized responses are cached per requested key set together with
+a strong ETag derived from the body, so unchanged settings cost one version
+lookup and, for clients that send If-None-Match, an empty 304.
+"""
+import hashlib
+import json
+import threading
+
+from admin_models import WebsiteSettings
+from cache import current_version, bump_version
+import metrics
+
+SETTINGS_CACHE = 'settings'
+# Label for the serialized-response cache in the metrics
+RESPONSES_CACHE = 'settings_responses'
+MAX_CACHED_RESPONSES = 64
+
+_lock = threading.Lock()
+_state = {'version': None, 'settings': {}, 'responses': {}}
+
+
+def invalidate(session):
+    bump_version(session, SETTINGS_CACHE)
+
+
+def _load(session, version):
+    settings = {s.key: s.value for s in session.query(WebsiteSettings).all()}
+    with _lock:
+        _state['version'] = version
+        _state['settings'] = settings
+        _state['responses'] = {}
+    return settings
+
+
+def _current_settings(session, version):
+    with _lock:
+        if _state['version'] == version:
+            metrics.cache_lookup(SETTINGS_CACHE, True)
+            return _state['settings']
+    metrics.cache_lookup(SETTINGS_CACHE, False)
+    return _load(session, version)
+
+
+def get_response(session, keys=None):
+    """
+    Return (body, etag) for the requested setting keys (all keys when None).
+    """
+    version = current_version(session, SETTINGS_CACHE)
+    settings = _current_settings(session, version)
+
+    # Unknown keys are dropped so they cannot grow the response cache
+    if keys is not None:
+        keys = tuple(sorted(key for key in set(keys) if key in settings))
+
+    with _lock:
+        if _state['version'] == version and keys in _state['responses']:
+            metrics.cache_lookup(RESPONSES_CACHE, True)
+            return _state['responses'][keys]
+    metrics.cache_lookup(RESPONSES_CACHE, False)
+
+    subset = settings if keys is None else {key: settings[key] for key in keys}
+    body = json.dumps(subset, sort_keys=True, separators=(',', ':')).encode()
+    entry = (body, hashlib.sha256(body).hexdigest()[:32])
+
+    with _lock:
+        if _state['version'] == version and len(_state['responses']) < MAX_CACHED_RESPONSES:
+            _state['responses'][keys] = entry
+    return entry
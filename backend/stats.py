@@ -0,0 +1,100 @@
+"""
+Dashboard counters.
+
+The admin dashboard reads a single StoreStats row instead of aggregating
+the product and order tables on every refresh. Each write that changes a
+counter adjusts it with a relative UPDATE in the caller's transaction, so
+the change commits or rolls back together with the order or product, and
+rebuild() recomputes everything from scratch for reconciliation. The row
+is created once by bootstrap, so writes only ever adjust it.
+"""
+import logging
+
+from sqlalchemy import func, select, update
+
+from models import Product, Order, StoreStats
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = 1
+COUNTERS = ('total_products', 'total_orders', 'pending_orders', 'total_revenue')
+PENDING_STATUS = 'Pending'
+
+
+def compute(session):
+    """Aggregate the counters from the source tables."""
+    total_orders, total_revenue = session.execute(
+        select(func.count(Order.id), func.coalesce(func.sum(Order.total_price), 0))
+    ).one()
+    return {
+        'total_products': session.scalar(select(func.count(Product.id))),
+        'total_orders': total_orders,
+        'pending_orders': session.scalar(
+            select(func.count(Order.id)).where(Order.status == PENDING_STATUS)
+        ),
+        'total_revenue': float(total_revenue)
+    }
+
+
+def rebuild(session):
+    """Recompute the stats row; returns it. Commits with the caller's transaction."""
+    values = compute(session)
+    stats = session.get(StoreStats, STATS_ID)
+    if stats is None:
+        stats = StoreStats(id=STATS_ID)
+        session.add(stats)
+    for name, value in values.items():
+        setattr(stats, name, value)
+    session.flush()
+    return stats
+
+
+def adjust(session, **deltas):
+    """Apply relative changes, e.g. adjust(session, total_orders=1)."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    columns = StoreStats.__table__.c
+    result = session.execute(
+        update(StoreStats)
+        .where(StoreStats.id == STATS_ID)
+        .values({name: columns[name] + delta for name, delta in deltas.items()})
+    )
+    # Rebuilding here would aggregate whole tables inside a checkout transaction
+    if result.rowcount == 0:
+        logger.warning('StoreStats row missing; run `flask bootstrap` or `flask reconcile-stats`')
+
+
+def ensure(session):
+    """Create the stats row from the tables unless it exists. Returns True if it was created."""
+    if session.get(StoreStats, STATS_ID) is not None:
+        return False
+    rebuild(session)
+    return True
+
+
+def get(session):
+    stats = session.get(StoreStats, STATS_ID)
+    if stats is None:
+        stats = rebuild(session)
+        session.commit()
+    return stats
+
+
+def order_created(session, order):
+    adjust(session,
+           total_orders=1,
+           pending_orders=1 if (order.status or PENDING_STATUS) == PENDING_STATUS else 0,
+           total_revenue=order.total_price)
+
+
+def order_status_changed(session, old_status, new_status):
+    if old_status == new_status:
+        return
+    delta = 0
+    if old_status == PENDING_STATUS:
+        delta -= 1
+    if new_status == PENDING_STATUS:
+        delta += 1
+    adjust(session, pending_orders=delta)
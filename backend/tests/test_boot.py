@@ -0,0 +1,24 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from instrumentation import QueryStats
+
+
+def test_create_app_runs_no_sql(database_url, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', database_url)
+    monkeypatch.setenv('RESERVATION_SWEEPER', '0')
+    from app import create_app
+
+    stats = QueryStats()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0)
+
+    # Every engine, including the ones create_app() is about to build
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        create_app()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+    assert stats.count == 0, stats.slowest_for_log()
@@ -0,0 +1,23 @@
+import bootstrap
+
+
+def _login(client):
+    response = client.post('/api/admin/login', json={
+        'username': bootstrap.DEFAULT_ADMIN['username'],
+        'password': bootstrap.DEFAULT_ADMIN['password'],
+    })
+    assert response.status_code == 200
+
+
+def test_profile_names_cannot_leave_the_profile_directory(app, client, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path / 'profiles')
+    (tmp_path / 'profiles' / 'api.get_products').mkdir(parents=True)
+    (tmp_path / 'profiles' / 'api.get_products' / 'kept.folded').write_text('main 1\n')
+    # Would be reached with '..' as the endpoint
+    (tmp_path / 'outside.folded').write_text('secret 1\n')
+    _login(client)
+
+    assert client.get('/api/admin/profiles/api.get_products/kept').status_code == 200
+    assert client.get('/api/admin/profiles/../outside').status_code == 404
+    assert client.get('/api/admin/profiles/%2E%2E/outside').status_code == 404
+    assert client.get('/api/admin/profiles?endpoint=..').json['profiles'] == []
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import insert
+
+from database import db
+from models import Product
+
+CUSTOMER = {
+    'customer_name': 'Ada', 'email': 'ada@example.com', 'phone': '555',
+    'address': '1 Main St', 'city': 'Springfield', 'zip_code': '12345',
+}
+
+
+def _products(*stocks):
+    ids = db.session.scalars(insert(Product).returning(Product.id, sort_by_parameter_order=True), [
+        {'name': f'Toy {n}', 'description': '', 'price': 4.5 + n, 'image_url': '',
+         'category': f'Category {n}', 'stock': stock}
+        for n, stock in enumerate(stocks)
+    ]).all()
+    db.session.commit()
+    return ids
+
+
+def test_checkout_stays_within_query_budgets(client):
+    kept, sold_out, held, last_units = _products(10, 2, 30, 3)
+
+    assert client.get('/api/categories').status_code == 200
+    reservation = client.post('/api/reservations', json={'items': [
+        {'id': sold_out, 'quantity': 1}, {'id': held, 'quantity': 5},
+    ]})
+    assert reservation.status_code == 201
+
+    # The first order: keyed, claiming a hold it only partly uses (the rest goes
+    # back to stock) and selling out a category
+    order = {**CUSTOMER, 'reservation_id': reservation.json['reservation_id'], 'items': [
+        {'id': kept, 'quantity': 1}, {'id': sold_out, 'quantity': 2}, {'id': held, 'quantity': 2},
+    ]}
+    response = client.post('/api/orders', json=order, headers={'Idempotency-Key': 'first-order-0001'})
+    assert response.status_code == 201
+
+    replay = client.post('/api/orders', json=order, headers={'Idempotency-Key': 'first-order-0001'})
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+
+    # Keyed order without a reservation that sells out another category
+    response = client.post('/api/orders', json={**CUSTOMER, 'items': [{'id': kept, 'quantity': 9}]},
+                           headers={'Idempotency-Key': 'second-order-0001'})
+    assert response.status_code == 201
+
+    # A hold that sells out a category
+    response = client.post('/api/reservations', json={'items': [{'id': last_units, 'quantity': 3}]})
+    assert response.status_code == 201
+
+    assert client.get('/api/categories').status_code == 200
+
+
+def _large_cart(client):
+    # Every line but the first sells out its category
+    ids = _products(50, *[2] * 29)
+    cart = [{'id': product_id, 'quantity': 2} for product_id in ids]
+    reservation = client.post('/api/reservations', json={'items': cart})
+    assert reservation.status_code == 201
+    response = client.post('/api/orders', json={
+        **CUSTOMER, 'items': cart, 'reservation_id': reservation.json['reservation_id'],
+    }, headers={'Idempotency-Key': 'large-cart-0001'})
+    assert response.status_code == 201
+
+
+def _price_changed_retry(client):
+    product_id, = _products(2)
+    order = {**CUSTOMER, 'items': [{'id': product_id, 'quantity': 2}], 'total_price': 1.0}
+    headers = {'Idempotency-Key': 'repriced-0001'}
+    stale = client.post('/api/orders', json=order, headers=headers)
+    assert stale.status_code == 409 and stale.json['price_changed']
+    # The customer confirms the new total with the same key
+    response = client.post('/api/orders', json={**order, 'total_price': stale.json['total_price']},
+                           headers=headers)
+    assert response.status_code == 201
+
+
+def _idempotent_replay(client):
+    product_id, = _products(5)
+    order = {**CUSTOMER, 'items': [{'id': product_id, 'quantity': 1}]}
+    headers = {'Idempotency-Key': 'replayed-0001'}
+    first = client.post('/api/orders', json=order, headers=headers)
+    assert first.status_code == 201
+    replay = client.post('/api/orders', json=order, headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.json == first.json
+
+
+@pytest.mark.parametrize('scenario', [_large_cart, _price_changed_retry, _idempotent_replay],
+                         ids=['large_cart', 'price_changed_retry', 'idempotent_replay'])
+def test_checkout_paths_stay_within_query_budgets(client, scenario):
+    assert client.get('/api/categories').status_code == 200
+    scenario(client)
+    assert client.get('/api/categories').status_code == 200
@@ -0,0 +1,9 @@
+from benchmarks import data
+from database import db
+import query_plans
+
+
+def test_hot_endpoints_use_indexes(app):
+    data.generate(db.session, products=200, orders=100)
+
+    assert query_plans.check(app) == []
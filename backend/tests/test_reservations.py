@@ -0,0 +1,95 @@
+import os
+import time
+
+from sqlalchemy import insert, select
+
+import bootstrap
+import reservations
+from database import db
+from models import Product
+
+
+def _product(stock):
+    product_id = db.session.scalar(insert(Product).values(
+        name='Kite', description='', price=5.0, image_url='', category='Outdoor', stock=stock
+    ).returning(Product.id))
+    db.session.commit()
+    return product_id
+
+
+def _stock(product_id):
+    db.session.expire_all()
+    return db.session.scalar(select(Product.stock).where(Product.id == product_id))
+
+
+def _login(client):
+    client.post('/api/admin/login', json={
+        'username': bootstrap.DEFAULT_ADMIN['username'],
+        'password': bootstrap.DEFAULT_ADMIN['password'],
+    })
+
+
+def test_holds_are_capped_per_product(client):
+    product_id = _product(100)
+
+    response = client.post('/api/reservations', json={'items': [{'id': product_id, 'quantity': 60}]})
+
+    assert response.status_code == 201
+    assert response.json['items'] == [{'id': product_id, 'quantity': reservations.MAX_HOLD_QUANTITY}]
+    assert _stock(product_id) == 100 - reservations.MAX_HOLD_QUANTITY
+
+
+def test_clients_have_a_limited_number_of_holds(client):
+    product_id = _product(100)
+    cart = {'items': [{'id': product_id, 'quantity': 1}]}
+
+    for _ in range(reservations.MAX_ACTIVE_RESERVATIONS):
+        assert client.post('/api/reservations', json=cart).status_code == 201
+    assert client.post('/api/reservations', json=cart).status_code == 429
+    other = client.post('/api/reservations', json=cart, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert other.status_code == 201
+
+
+def test_admin_stock_edit_accounts_for_holds(app, client):
+    product_id = _product(10)
+    reservation = client.post('/api/reservations', json={'items': [{'id': product_id, 'quantity': 3}]}).json
+    _login(client)
+
+    listed = {p['id']: p for p in client.get('/api/admin/products').json}
+    assert listed[product_id]['stock'] == 10
+
+    assert client.put(f'/api/admin/products/{product_id}', json={'stock': 2}).status_code == 409
+    response = client.put(f'/api/admin/products/{product_id}', json={'stock': 20})
+    assert response.json['product']['stock'] == 20
+    assert _stock(product_id) == 17
+
+    client.delete(f"/api/reservations/{reservation['reservation_id']}")
+    assert _stock(product_id) == 20
+
+
+def test_deleting_a_product_drops_its_holds(client):
+    product_id = _product(10)
+    assert client.post('/api/reservations', json={'items': [{'id': product_id, 'quantity': 2}]}).status_code == 201
+    _login(client)
+
+    assert client.delete(f'/api/admin/products/{product_id}').status_code == 200
+    assert db.session.get(Product, product_id) is None
+
+
+def test_sweeper_starts_with_the_app(database_url, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', database_url)
+    monkeypatch.setenv('RESERVATION_SWEEPER', '1')
+    monkeypatch.setattr(reservations, '_sweeper', {'pid': None})
+    started = []
+    monkeypatch.setattr(reservations, '_sweep', started.append)
+    from app import create_app
+
+    app = create_app()
+
+    assert reservations._sweeper['pid'] == os.getpid()
+    # The thread may not have run yet
+    for _ in range(100):
+        if started:
+            break
+        time.sleep(0.01)
+    assert started == [app]
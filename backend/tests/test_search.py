@@ -0,0 +1,36 @@
+from sqlalchemy import insert
+
+from database import db
+from models import Product
+
+
+def _add_products(rows):
+    db.session.execute(insert(Product), [
+        {'price': 10.0, 'stock': 5, 'category': 'Toys', 'image_url': '', **row} for row in rows
+    ])
+    db.session.commit()
+
+
+def test_typeahead_ranks_every_match(client):
+    # Hundreds of weak matches come first in rowid order
+    _add_products([
+        {'name': f'Wooden Train {n}', 'description': 'Comes with a little robot driver.'}
+        for n in range(600)
+    ])
+    _add_products([{'name': 'Robot', 'description': 'A robot.'}])
+
+    response = client.get('/api/products/search?q=rob&typeahead=1&limit=5')
+
+    assert response.status_code == 200
+    assert response.json['products'][0]['name'] == 'Robot'
+
+
+def test_search_pages_in_rank_order(client):
+    _add_products([{'name': f'Kite {n}', 'description': 'Flies high.'} for n in range(7)])
+
+    first = client.get('/api/products/search?q=kite&limit=5').json
+    second = client.get(f"/api/products/search?q=kite&limit=5&offset={first['next_offset']}").json
+
+    names = [p['name'] for p in first['products'] + second['products']]
+    assert sorted(names) == sorted(f'Kite {n}' for n in range(7))
+    assert second['next_offset'] is None
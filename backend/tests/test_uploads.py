@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import bootstrap
+import image_jobs
+import upload_store
+
+
+@pytest.fixture
+def upload_dirs(app, tmp_path, monkeypatch):
+    """Write uploads under tmp_path and run image jobs inline."""
+    monkeypatch.setattr(image_jobs, 'UPLOAD_ROOT', str(tmp_path))
+    for prefix in upload_store.UPLOAD_DIRS:
+        monkeypatch.setitem(upload_store.UPLOAD_DIRS, prefix, str(tmp_path / prefix.split('/')[2]))
+    app.config['IMAGE_JOBS_INLINE'] = True
+    return tmp_path
+
+
+def _login(client):
+    client.post('/api/admin/login', json={
+        'username': bootstrap.DEFAULT_ADMIN['username'],
+        'password': bootstrap.DEFAULT_ADMIN['password'],
+    })
+
+
+def _image(fmt, size, mode='RGB'):
+    out = io.BytesIO()
+    Image.new(mode, size, (200, 40, 40, 255)[:len(mode)]).save(out, fmt)
+    return out.getvalue()
+
+
+def _stored(upload_dirs, url):
+    with open(upload_dirs / url.split('/uploads/', 1)[1], 'rb') as f:
+        return f.read()
+
+
+def _named_after_content(url, data):
+    return url.rsplit('/', 1)[1].startswith(
+        upload_store.HASH_PREFIX + hashlib.sha256(data).hexdigest()[:upload_store.HASH_LENGTH] + '.')
+
+
+def test_product_upload_keeps_the_original_bytes(client, upload_dirs):
+    _login(client)
+    data = _image('JPEG', (2000, 1500))
+    response = client.post('/api/admin/upload-image', data={'image': (io.BytesIO(data), 'photo.jpg')})
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert client.get(f"/api/admin/image-jobs/{body['job']['id']}").get_json()['status'] == 'ready'
+
+    assert _stored(upload_dirs, body['image_url']) == data
+    assert _named_after_content(body['image_url'], data)
+    for variant in body['image_variants'].values():
+        for ext in ('webp', 'jpg'):
+            assert os.path.exists(upload_dirs / variant[ext].split('/uploads/', 1)[1])
+
+
+@pytest.mark.parametrize('mode, filename, ext', [('RGB', 'logo.jpg', 'jpg'), ('RGBA', 'logo.webp', 'png')])
+def test_logo_is_named_after_its_optimized_bytes(client, upload_dirs, mode, filename, ext):
+    _login(client)
+    data = _image('PNG' if ext == 'png' else 'JPEG', (1200, 300), mode)
+    response = client.post('/api/admin/upload-logo', data={'logo': (io.BytesIO(data), filename)})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['job']['status'] == 'ready'
+    assert body['logo_url'].endswith('.' + ext)
+
+    stored = _stored(upload_dirs, body['logo_url'])
+    assert _named_after_content(body['logo_url'], stored)
+    with Image.open(io.BytesIO(stored)) as logo:
+        assert logo.width == 500
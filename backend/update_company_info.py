@@ -4,6 +4,7 @@ Script to update company information in the database
 from app import app
 from admin_models import WebsiteSettings
 from database import db
+import settings_cache
 
 def update_company_info():
     with app.app_context():
@@ -29,6 +30,7 @@ def update_company_info():
                 db.session.add(setting)
                 print(f"✅ Created {key}")
         
+        settings_cache.invalidate(db.session)
         db.session.commit()
         print("\n✅ Company information updated successfully!")
         print("The admin settings panel now shows the correct UNICORNKART LLC information.")
@@ -5,6 +5,7 @@ Run this once to populate the database with the full policy content
 from app import app
 from admin_models import WebsiteSettings
 from database import db
+import settings_cache
 
 # Privacy Policy Content
 privacy_policy_content = """# Privacy Policy
@@ -297,6 +298,7 @@ def update_settings():
             setting = WebsiteSettings(key='about_us', value=about_us_content)
             db.session.add(setting)
         
+        settings_cache.invalidate(db.session)
         db.session.commit()
         print("✅ Settings updated successfully!")
         print("Privacy Policy, Terms and Conditions, Refund Policy, and About Us content have been populated.")
@@ -0,0 +1,84 @@
+"""
+Serving of uploaded images when no web server sits in front of the app.
+
+Files are sent with conditional GET (ETag / Last-Modified) and Range
+support. A content-hashed upload is cached as immutable for a year once its
+image job is ready; until then its variants may still be half written, so
+clients revalidate it. Legacy random names get an hour. With UPLOAD_SENDFILE set, the bytes are handed to the
+front server through X-Sendfile or X-Accel-Redirect instead of being
+streamed by a Python worker.
+"""
+import mimetypes
+import os
+import posixpath
+
+from flask import Blueprint, abort, current_app, send_from_directory
+from werkzeug.security import safe_join
+
+from database import db
+from images import UPLOAD_ROOT
+from upload_store import is_content_addressed, source_stem
+import image_jobs
+
+uploads = Blueprint('uploads', __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Legacy uploads with random names are revalidated after an hour
+UPLOAD_MAX_AGE = 3600
+
+# Hashed uploads whose job is ready; their bytes never change again
+_final_uploads = set()
+MAX_FINAL_UPLOADS = 10000
+
+
+def _is_final(filename):
+    name = os.path.basename(filename)
+    if not is_content_addressed(name):
+        return False
+    url_stem = '/uploads/' + posixpath.join(posixpath.dirname(filename), source_stem(name))
+    if url_stem in _final_uploads:
+        return True
+    if not image_jobs.is_ready(db.session, url_stem):
+        return False
+    if len(_final_uploads) >= MAX_FINAL_UPLOADS:
+        _final_uploads.clear()
+    _final_uploads.add(url_stem)
+    return True
+
+
+def _set_cache_headers(response, filename):
+    response.cache_control.public = True
+    if _is_final(filename):
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    elif is_content_addressed(os.path.basename(filename)):
+        # Still being processed: the original is rewritten when the job finishes
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = 0
+    else:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = UPLOAD_MAX_AGE
+    return response
+
+
+def _accel_redirect(filename):
+    # nginx serves the internal location itself, including ETag and Range handling
+    path = safe_join(UPLOAD_ROOT, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    response = current_app.response_class()
+    response.headers['X-Accel-Redirect'] = current_app.config['UPLOAD_ACCEL_PREFIX'] + filename
+    response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return response
+
+
+@uploads.route('/uploads/<path:filename>')
+def serve_upload(filename):
+    if current_app.config.get('UPLOAD_SENDFILE') == 'x-accel-redirect':
+        response = _accel_redirect(filename)
+    else:
+        # send_file answers If-None-Match / If-Modified-Since and Range requests,
+        # and emits X-Sendfile instead of the body when USE_X_SENDFILE is on
+        response = send_from_directory(UPLOAD_ROOT, filename, conditional=True, etag=True)
+    return _set_cache_headers(response, filename)
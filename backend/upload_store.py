@@ -0,0 +1,162 @@
+"""
+Content-addressed storage for admin uploads.
+
+Uploads are named after the SHA-256 of their bytes ("sha256-<hex>.<ext>"),
+so uploading the same photo twice stores it once. The prefix keeps them
+apart from legacy uploads, whose random hex names have the same length. Nothing is deleted when a product or logo stops
+using a file; collect_garbage() removes uploads that no product image_url or
+the logo_url setting refers to, once they are older than a grace period.
+"""
+import hashlib
+import os
+import secrets
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy import delete, select
+
+from admin_models import ImageJob, WebsiteSettings
+from images import UPLOAD_ROOT, VARIANTS, VARIANT_FORMATS, VARIANT_FILE_PATTERN, variant_filename
+from models import Product
+
+# url prefix -> directory of each upload kind
+UPLOAD_DIRS = {
+    '/uploads/products/': os.path.join(UPLOAD_ROOT, 'products'),
+    '/uploads/logos/': os.path.join(UPLOAD_ROOT, 'logos'),
+}
+
+# Unreferenced files younger than this are kept, so an image uploaded for a
+# product that has not been saved yet is not collected
+GC_GRACE = timedelta(hours=24)
+
+HASH_PREFIX = 'sha256-'
+HASH_LENGTH = 32
+HEX_DIGITS = frozenset('0123456789abcdef')
+CHUNK_SIZE = 64 * 1024
+TEMP_SUFFIX = '.part'
+
+# Equivalent extensions share one name so the same bytes map to one file
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+def _normalize_extension(filename):
+    ext = filename.rsplit('.', 1)[1].lower()
+    return EXTENSION_ALIASES.get(ext, ext)
+
+
+def store(file, url_prefix, filename):
+    """
+    Save an uploaded file under the hash of its content.
+
+    Returns (url, created); created is False when identical bytes were
+    already stored, in which case the existing file is reused as is.
+    """
+    directory = UPLOAD_DIRS[url_prefix]
+    os.makedirs(directory, exist_ok=True)
+
+    # Hash while copying to a temporary file in the same directory, so the
+    # final rename is atomic and concurrent identical uploads are harmless
+    digest = hashlib.sha256()
+    temp_path = os.path.join(directory, f'.{secrets.token_hex(8)}{TEMP_SUFFIX}')
+    file.stream.seek(0)
+    try:
+        with open(temp_path, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+
+        name = f'{HASH_PREFIX}{digest.hexdigest()[:HASH_LENGTH]}.{_normalize_extension(filename)}'
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            # Restart the grace period so the collector keeps a file that is being reused
+            os.utime(path)
+            return url_prefix + name, False
+        os.replace(temp_path, path)
+        return url_prefix + name, True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def source_stem(filename):
+    """Name of the original upload a file (or one of its variants) belongs to, without extension."""
+    return VARIANT_FILE_PATTERN.sub('', filename).rsplit('.', 1)[0]
+
+
+def is_content_addressed(filename):
+    """True for files (or their variants) named after a content hash."""
+    stem = source_stem(filename)
+    digest = stem[len(HASH_PREFIX):]
+    return stem.startswith(HASH_PREFIX) and len(digest) == HASH_LENGTH and HEX_DIGITS.issuperset(digest)
+
+
+def _upload_url(value):
+    """The /uploads/... path of a stored URL, or None for external images."""
+    if not value:
+        return None
+    path = urlsplit(value).path
+    if any(path.startswith(prefix) for prefix in UPLOAD_DIRS):
+        return path
+    return None
+
+
+def referenced_urls(session):
+    """Every upload URL that a product, the logo setting or an unfinished image job uses."""
+    values = list(session.scalars(select(Product.image_url).where(Product.image_url.isnot(None))))
+    values += session.scalars(select(WebsiteSettings.value).where(WebsiteSettings.key == 'logo_url'))
+    values += session.scalars(select(ImageJob.image_url).where(ImageJob.status.in_(('pending', 'processing'))))
+    return {url for url in map(_upload_url, values) if url}
+
+
+def collect_garbage(session, grace=GC_GRACE, dry_run=False):
+    """
+    Delete uploads nothing refers to, with their variants and image jobs.
+
+    Returns {'removed': [...urls], 'bytes_freed': n}. Job rows are deleted in
+    the caller's transaction; files are removed immediately unless dry_run.
+    """
+    referenced = referenced_urls(session)
+    cutoff = time.time() - grace.total_seconds()
+    removed, removed_files, freed = [], [], 0
+
+    for url_prefix, directory in UPLOAD_DIRS.items():
+        if not os.path.isdir(directory):
+            continue
+        filenames = sorted(os.listdir(directory))
+        sources = {name.rsplit('.', 1)[0]: name for name in filenames
+                   if not VARIANT_FILE_PATTERN.search(name) and not name.startswith('.')}
+
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+                continue
+
+            if filename.startswith('.'):
+                # Left behind by an interrupted upload
+                orphaned = filename.endswith(TEMP_SUFFIX)
+            elif VARIANT_FILE_PATTERN.search(filename):
+                # Variants go with their source below, or now if the source is gone
+                orphaned = source_stem(filename) not in sources
+            else:
+                orphaned = url_prefix + filename not in referenced
+                if orphaned:
+                    removed.append(url_prefix + filename)
+                    for variant in VARIANTS:
+                        for ext in VARIANT_FORMATS:
+                            variant_path = os.path.join(directory, variant_filename(filename, variant, ext))
+                            if os.path.exists(variant_path):
+                                removed_files.append(variant_path)
+
+            if orphaned:
+                removed_files.append(path)
+
+    for path in dict.fromkeys(removed_files):
+        freed += os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+
+    if removed and not dry_run:
+        session.execute(delete(ImageJob).where(ImageJob.image_url.in_(removed)))
+
+    return {'removed': removed, 'bytes_freed': freed}
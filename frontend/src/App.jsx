@@ -83,6 +83,17 @@ function App() {
         setCartItems([]);
     };
 
+    // Replace cart prices with the current ones from the server: { productId: price }
+    const updatePrices = (prices) => {
+        setCartItems(prev =>
+            prev.map(item =>
+                prices[item.id] !== undefined
+                    ? { ...item, price: prices[item.id] }
+                    : item
+            )
+        );
+    };
+
     const handleAdminLogin = (adminData) => {
         setAdmin(adminData);
     };
@@ -150,7 +161,7 @@ function App() {
                             <Routes>
                                 <Route path="/" element={<Home addToCart={addToCart} />} />
                                 <Route path="/product/:id" element={<ProductDetails addToCart={addToCart} />} />
-                                <Route path="/checkout" element={<Checkout cartItems={cartItems} clearCart={clearCart} />} />
+                                <Route path="/checkout" element={<Checkout cartItems={cartItems} clearCart={clearCart} updatePrices={updatePrices} />} />
                                 <Route path="/privacy-policy" element={<PrivacyPolicy />} />
                                 <Route path="/refund-policy" element={<RefundPolicy />} />
                                 <Route path="/terms-and-conditions" element={<TermsAndConditions />} />
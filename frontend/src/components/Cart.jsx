@@ -48,7 +48,7 @@ const Cart = ({ isOpen, onClose, cartItems, updateQuantity, removeFromCart }) =>
                                                 <li key={item.id} className="py-6 flex">
                                                     <div className="flex-shrink-0 w-24 h-24 border border-gray-100 rounded-2xl overflow-hidden bg-gray-50">
                                                         <img
-                                                            src={item.image_url}
+                                                            src={item.image_variants?.thumb?.jpg || item.image_url}
                                                             alt={item.name}
                                                             className="w-full h-full object-center object-cover"
                                                         />
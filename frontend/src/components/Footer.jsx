@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { Mail, Phone, MapPin } from 'lucide-react';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const Footer = () => {
     const [settings, setSettings] = useState({
@@ -18,7 +18,7 @@ const Footer = () => {
 
     const fetchSettings = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['website_name', 'company_address', 'company_ein', 'company_phone', 'company_email']));
             if (response.ok) {
                 const data = await response.json();
                 setSettings({
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { ShoppingCart, Store, Search } from 'lucide-react';
 import { Link } from 'react-router-dom';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const Navbar = ({ cartCount, toggleCart }) => {
     const [settings, setSettings] = useState({
@@ -15,7 +15,7 @@ const Navbar = ({ cartCount, toggleCart }) => {
 
     const fetchSettings = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['website_name', 'logo_url']));
             if (response.ok) {
                 const data = await response.json();
                 setSettings({
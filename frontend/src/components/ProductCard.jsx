@@ -2,16 +2,33 @@ import React from 'react';
 import { Plus, Star } from 'lucide-react';
 import { Link } from 'react-router-dom';
 
+// Grid columns: 4 on xl, 3 on lg, 2 on sm, 1 below
+const CARD_IMAGE_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
+const buildSrcSet = (variants, format) =>
+  Object.values(variants).map((variant) => `${variant[format]} ${variant.width}w`).join(', ');
+
 const ProductCard = ({ product, addToCart }) => {
+  const variants = product.image_variants || {};
+  const hasVariants = Object.keys(variants).length > 0;
+
   return (
     <div className="bg-white rounded-3xl shadow-sm hover:shadow-xl transition-all duration-300 overflow-hidden group border border-gray-100 hover:-translate-y-1 relative">
       <Link to={`/product/${product.id}`} className="block">
         <div className="relative aspect-square overflow-hidden bg-gray-50">
-          <img
-            src={product.image_url}
-            alt={product.name}
-            className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-500"
-          />
+          <picture className="block w-full h-full">
+            {hasVariants && (
+              <source type="image/webp" srcSet={buildSrcSet(variants, 'webp')} sizes={CARD_IMAGE_SIZES} />
+            )}
+            <img
+              src={hasVariants ? variants.card.jpg : product.image_url}
+              srcSet={hasVariants ? buildSrcSet(variants, 'jpg') : undefined}
+              sizes={hasVariants ? CARD_IMAGE_SIZES : undefined}
+              alt={product.name}
+              loading="lazy"
+              className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-500"
+            />
+          </picture>
           <div className="absolute top-3 right-3 bg-white/90 backdrop-blur-sm px-3 py-1 rounded-full text-xs font-bold text-primary-600 shadow-sm">
             {product.category}
           </div>
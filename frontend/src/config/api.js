@@ -36,6 +36,7 @@ export const API_ENDPOINTS = {
     ADMIN_SETTINGS: buildApiUrl('api/admin/settings'),
     ADMIN_PRODUCTS: buildApiUrl('api/admin/products'),
     ADMIN_ORDERS: buildApiUrl('api/admin/orders'),
+    ADMIN_ORDERS_EXPORT: buildApiUrl('api/admin/orders/export'),
     ADMIN_UPLOAD_IMAGE: buildApiUrl('api/admin/upload-image'),
     ADMIN_UPLOAD_LOGO: buildApiUrl('api/admin/upload-logo'),
 };
@@ -43,6 +44,26 @@ export const API_ENDPOINTS = {
 // Helper function for dynamic endpoints (e.g., with IDs)
 export const getAdminProductUrl = (id) => buildApiUrl(`api/admin/products/${id}`);
 export const getAdminOrderStatusUrl = (orderId) => buildApiUrl(`api/admin/orders/${orderId}/status`);
+export const getSettingsUrl = (keys) => `${API_ENDPOINTS.SETTINGS}?keys=${keys.join(',')}`;
+export const getAdminImageJobUrl = (jobId) => buildApiUrl(`api/admin/image-jobs/${jobId}`);
+
+// Uploaded images are optimized in the background; poll until the job is done
+export const waitForImageJob = async (jobId, { interval = 500, timeout = 60000 } = {}) => {
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        const response = await fetch(getAdminImageJobUrl(jobId), { credentials: 'include' });
+        if (!response.ok) {
+            throw new Error('Failed to check image processing status');
+        }
+        const job = await response.json();
+        if (job.status === 'ready') return job;
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Image processing failed');
+        }
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+    throw new Error('Image processing is taking longer than expected');
+};
 
 export default {
     API_BASE_URL,
@@ -50,4 +71,7 @@ export default {
     API_ENDPOINTS,
     getAdminProductUrl,
     getAdminOrderStatusUrl,
+    getSettingsUrl,
+    getAdminImageJobUrl,
+    waitForImageJob,
 };
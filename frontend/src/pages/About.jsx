@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowLeft, Heart, Award, Users, Sparkles } from 'lucide-react';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const About = () => {
     const [settings, setSettings] = useState({
@@ -15,7 +15,7 @@ const About = () => {
 
     const fetchSettings = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['website_name', 'about_us']));
             if (response.ok) {
                 const data = await response.json();
                 setSettings({
@@ -1,9 +1,9 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import axios from 'axios';
 import { ArrowLeft, CheckCircle, CreditCard, MapPin, Mail, User, Truck } from 'lucide-react';
 
-const Checkout = ({ cartItems, clearCart }) => {
+const Checkout = ({ cartItems, clearCart, updatePrices }) => {
     const navigate = useNavigate();
     const [formData, setFormData] = useState({
         customer_name: '',
@@ -15,9 +15,48 @@ const Checkout = ({ cartItems, clearCart }) => {
     });
     const [isSubmitting, setIsSubmitting] = useState(false);
     const [orderComplete, setOrderComplete] = useState(false);
+    // Set when the server repriced the cart; paying again confirms the new total
+    const [priceNotice, setPriceNotice] = useState(null);
+    // One key per checkout, so double submits and retries place a single order
+    const [idempotencyKey] = useState(() => crypto.randomUUID());
+
+    // Stock held for this checkout; released if the customer leaves without ordering
+    const reservationRef = useRef(null);
+    const orderPlacedRef = useRef(false);
 
     const total = cartItems.reduce((sum, item) => sum + item.price * item.quantity, 0);
 
+    useEffect(() => {
+        if (cartItems.length === 0) return;
+        let cancelled = false;
+
+        axios.post('/api/reservations', {
+            items: cartItems.map((item) => ({ id: item.id, quantity: item.quantity }))
+        }).then((response) => {
+            if (cancelled) {
+                axios.delete(`/api/reservations/${response.data.reservation_id}`).catch(() => {});
+            } else {
+                reservationRef.current = response.data.reservation_id;
+            }
+        }).catch((error) => {
+            const outOfStock = error.response?.data?.out_of_stock;
+            if (!cancelled && outOfStock && outOfStock.length > 0) {
+                const names = outOfStock.map((item) => `${item.name} (${item.available} left)`).join(', ');
+                alert(`Sorry, some items are out of stock: ${names}`);
+            }
+        });
+
+        return () => {
+            cancelled = true;
+            if (reservationRef.current && !orderPlacedRef.current) {
+                axios.delete(`/api/reservations/${reservationRef.current}`).catch(() => {});
+            }
+            reservationRef.current = null;
+        };
+        // Hold the cart as it was when checkout opened
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, []);
+
     const handleChange = (e) => {
         setFormData({ ...formData, [e.target.name]: e.target.value });
     };
@@ -25,19 +64,35 @@ const Checkout = ({ cartItems, clearCart }) => {
     const handleSubmit = async (e) => {
         e.preventDefault();
         setIsSubmitting(true);
+        setPriceNotice(null);
 
         try {
             await axios.post('/api/orders', {
                 ...formData,
                 total_price: total,
-                items: cartItems
+                items: cartItems,
+                reservation_id: reservationRef.current
+            }, {
+                headers: { 'Idempotency-Key': idempotencyKey }
             });
 
+            orderPlacedRef.current = true;
             clearCart();
             setOrderComplete(true);
         } catch (error) {
             console.error('Order failed:', error);
-            alert('Failed to place order. Please try again.');
+            const data = error.response?.data;
+            const outOfStock = data?.out_of_stock;
+            if (data?.price_changed) {
+                // Show the current prices; the next submit sends the matching total
+                updatePrices(Object.fromEntries(data.items.map((item) => [item.id, item.price])));
+                setPriceNotice(`Prices have changed since you added these items. The new total is $${data.total_price.toFixed(2)}. Review your order and press Pay to confirm.`);
+            } else if (outOfStock && outOfStock.length > 0) {
+                const names = outOfStock.map((item) => `${item.name} (${item.available} left)`).join(', ');
+                alert(`Sorry, some items are out of stock: ${names}`);
+            } else {
+                alert('Failed to place order. Please try again.');
+            }
         } finally {
             setIsSubmitting(false);
         }
@@ -200,6 +255,12 @@ const Checkout = ({ cartItems, clearCart }) => {
                                         </div>
                                     </div>
 
+                                    {priceNotice && (
+                                        <div role="alert" className="mt-8 p-4 rounded-xl border border-amber-200 bg-amber-50 text-amber-800 text-sm font-medium">
+                                            {priceNotice}
+                                        </div>
+                                    )}
+
                                     <button
                                         type="submit"
                                         disabled={isSubmitting}
@@ -229,7 +290,7 @@ const Checkout = ({ cartItems, clearCart }) => {
                                     {cartItems.map((item) => (
                                         <li key={item.id} className="py-6 flex">
                                             <div className="flex-shrink-0 w-20 h-20 border border-gray-100 rounded-xl overflow-hidden bg-gray-50">
-                                                <img src={item.image_url} alt={item.name} className="w-full h-full object-center object-cover" />
+                                                <img src={item.image_variants?.thumb?.jpg || item.image_url} alt={item.name} className="w-full h-full object-center object-cover" />
                                             </div>
                                             <div className="ml-4 flex-1">
                                                 <div className="flex justify-between text-base font-bold text-gray-900">
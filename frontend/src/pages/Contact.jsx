@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowLeft, Mail, Phone, MapPin, Send } from 'lucide-react';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const Contact = () => {
     const [settings, setSettings] = useState({
@@ -24,7 +24,7 @@ const Contact = () => {
 
     const fetchSettings = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['website_name', 'company_address', 'company_phone', 'company_email']));
             if (response.ok) {
                 const data = await response.json();
                 setSettings({
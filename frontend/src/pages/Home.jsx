@@ -8,12 +8,15 @@ const Home = ({ addToCart }) => {
     const [products, setProducts] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         const fetchProducts = async () => {
             try {
                 const response = await axios.get('/api/products');
-                setProducts(response.data);
+                setProducts(response.data.products);
+                setNextCursor(response.data.next_cursor);
                 setLoading(false);
             } catch (err) {
                 console.error('Error fetching products:', err);
@@ -25,6 +28,19 @@ const Home = ({ addToCart }) => {
         fetchProducts();
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await axios.get('/api/products', { params: { cursor: nextCursor } });
+            setProducts((current) => [...current, ...response.data.products]);
+            setNextCursor(response.data.next_cursor);
+        } catch (err) {
+            console.error('Error fetching more products:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) {
         return (
             <div className="min-h-screen flex items-center justify-center bg-primary-50">
@@ -63,6 +79,18 @@ const Home = ({ addToCart }) => {
                         <ProductCard key={product.id} product={product} addToCart={addToCart} />
                     ))}
                 </div>
+
+                {nextCursor && (
+                    <div className="text-center mt-12">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="bg-primary-600 text-white px-8 py-3 rounded-2xl font-bold hover:bg-primary-700 disabled:opacity-50 transition-colors"
+                        >
+                            {loadingMore ? 'Loading...' : 'Load more toys'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
@@ -28,6 +28,9 @@ const ProductDetails = ({ addToCart }) => {
     if (error) return <div className="min-h-screen flex items-center justify-center text-red-500">{error}</div>;
     if (!product) return null;
 
+    // Sized copies of uploaded images; external image URLs have none
+    const variants = product.image_variants?.detail ? product.image_variants : null;
+
     return (
         <div className="bg-slate-50 min-h-screen py-12 px-4 sm:px-6 lg:px-8">
             <div className="max-w-7xl mx-auto">
@@ -40,7 +43,9 @@ const ProductDetails = ({ addToCart }) => {
                     <div className="grid grid-cols-1 md:grid-cols-2">
                         <div className="h-96 md:h-[600px] bg-gray-50 relative group">
                             <img
-                                src={product.image_url}
+                                src={variants ? variants.detail.jpg : product.image_url}
+                                srcSet={variants ? `${variants.detail.jpg} ${variants.detail.width}w, ${variants.zoom.jpg} ${variants.zoom.width}w` : undefined}
+                                sizes={variants ? '(min-width: 768px) 50vw, 100vw' : undefined}
                                 alt={product.name}
                                 className="w-full h-full object-cover object-center group-hover:scale-105 transition-transform duration-700"
                             />
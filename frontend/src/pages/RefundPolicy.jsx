@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowLeft } from 'lucide-react';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const RefundPolicy = () => {
     const [content, setContent] = useState('');
@@ -13,7 +13,7 @@ const RefundPolicy = () => {
 
     const fetchContent = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['refund_policy']));
             if (response.ok) {
                 const data = await response.json();
                 setContent(data.refund_policy || 'Refund Policy content not available.');
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowLeft } from 'lucide-react';
-import { API_ENDPOINTS } from '../config/api';
+import { getSettingsUrl } from '../config/api';
 
 const TermsAndConditions = () => {
     const [content, setContent] = useState('');
@@ -13,7 +13,7 @@ const TermsAndConditions = () => {
 
     const fetchContent = async () => {
         try {
-            const response = await fetch(API_ENDPOINTS.SETTINGS);
+            const response = await fetch(getSettingsUrl(['terms_and_conditions']));
             if (response.ok) {
                 const data = await response.json();
                 setContent(data.terms_and_conditions || 'Terms and Conditions content not available.');
@@ -6,21 +6,28 @@ function OrderManagement() {
     const [orders, setOrders] = useState([]);
     const [loading, setLoading] = useState(true);
     const [selectedOrder, setSelectedOrder] = useState(null);
+    const [statusFilter, setStatusFilter] = useState('');
+    const [nextCursor, setNextCursor] = useState(null);
     const navigate = useNavigate();
 
     useEffect(() => {
         fetchOrders();
-    }, []);
+    }, [statusFilter]);
 
-    const fetchOrders = async () => {
+    const fetchOrders = async (cursor = null) => {
         try {
-            const response = await fetch(API_ENDPOINTS.ADMIN_ORDERS, {
+            const params = new URLSearchParams();
+            if (statusFilter) params.set('status', statusFilter);
+            if (cursor) params.set('cursor', cursor);
+
+            const response = await fetch(`${API_ENDPOINTS.ADMIN_ORDERS}?${params}`, {
                 credentials: 'include'
             });
 
             if (response.ok) {
                 const data = await response.json();
-                setOrders(data);
+                setOrders((current) => (cursor ? [...current, ...data.orders] : data.orders));
+                setNextCursor(data.next_cursor);
             } else if (response.status === 401) {
                 navigate('/admin/login');
             }
@@ -91,6 +98,26 @@ function OrderManagement() {
                             Order Management
                         </h1>
                     </div>
+                    <div className="flex items-center space-x-3">
+                        <a
+                            href={`${API_ENDPOINTS.ADMIN_ORDERS_EXPORT}?format=csv${statusFilter ? `&status=${statusFilter}` : ''}`}
+                            className="px-4 py-2 bg-purple-600 text-white rounded-lg text-sm font-medium hover:bg-purple-700 transition"
+                        >
+                            Export CSV
+                        </a>
+                        <select
+                            value={statusFilter}
+                            onChange={(e) => setStatusFilter(e.target.value)}
+                            className="px-4 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-purple-500"
+                        >
+                            <option value="">All statuses</option>
+                            <option value="Pending">Pending</option>
+                            <option value="Processing">Processing</option>
+                            <option value="Shipped">Shipped</option>
+                            <option value="Delivered">Delivered</option>
+                            <option value="Cancelled">Cancelled</option>
+                        </select>
+                    </div>
                 </div>
             </header>
 
@@ -152,6 +179,17 @@ function OrderManagement() {
                             <p className="text-gray-500 text-lg">No orders found.</p>
                         </div>
                     )}
+
+                    {nextCursor && (
+                        <div className="text-center py-6 border-t border-gray-200">
+                            <button
+                                onClick={() => fetchOrders(nextCursor)}
+                                className="text-purple-600 hover:text-purple-800 font-medium"
+                            >
+                                Load more orders
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { API_ENDPOINTS, API_BASE_URL, getAdminProductUrl } from '../../config/api';
+import { API_ENDPOINTS, API_BASE_URL, getAdminProductUrl, waitForImageJob } from '../../config/api';
 
 function ProductManagement() {
     const [products, setProducts] = useState([]);
@@ -73,6 +73,7 @@ function ProductManagement() {
 
             if (response.ok) {
                 const data = await response.json();
+                await waitForImageJob(data.job.id);
                 const fullImageUrl = `${API_BASE_URL}${data.image_url}`;
                 setFormData({ ...formData, image_url: fullImageUrl });
                 setImagePreview(fullImageUrl);
@@ -82,7 +83,7 @@ function ProductManagement() {
             }
         } catch (err) {
             console.error('Error uploading image:', err);
-            alert('Upload failed. Please try again.');
+            alert(err.message || 'Upload failed. Please try again.');
         } finally {
             setUploading(false);
         }
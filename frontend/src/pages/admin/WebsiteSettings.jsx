@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { API_ENDPOINTS } from '../../config/api';
+import { API_ENDPOINTS, waitForImageJob } from '../../config/api';
 
 function WebsiteSettings() {
     const [settings, setSettings] = useState({
@@ -89,6 +89,7 @@ function WebsiteSettings() {
 
             if (response.ok) {
                 const data = await response.json();
+                await waitForImageJob(data.job.id);
                 setSettings({ ...settings, logo_url: data.logo_url });
                 setLogoPreview(data.logo_url);
                 setMessage('Logo uploaded successfully!');
@@ -99,7 +100,7 @@ function WebsiteSettings() {
             }
         } catch (err) {
             console.error('Error uploading logo:', err);
-            setMessage('Error uploading logo');
+            setMessage(err.message || 'Error uploading logo');
         } finally {
             setUploadingLogo(false);
         }
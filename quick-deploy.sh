@@ -96,6 +96,16 @@ echo -e "\n${BLUE}🚀 Starting backend with gunicorn...${NC}"
 cd "$DEPLOY_DIR/backend"
 source venv/bin/activate
 
+# Apply migrations and default data once, before any worker starts
+flask --app app bootstrap
+
+# Uploads from before responsive images have no card/thumb variants yet
+flask --app app backfill-images
+
+# Workers share their metrics through files in this directory
+export PROMETHEUS_MULTIPROC_DIR="$DEPLOY_DIR/backend/metrics-data"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 nohup gunicorn --workers 4 --bind 0.0.0.0:5000 app:app > gunicorn.log 2>&1 &
 
 # Get the PID
@@ -112,6 +112,14 @@ fi
 source venv/bin/activate
 pip install gunicorn
 
+# Apply migrations and default data once, before any worker starts
+echo "Bootstrapping database..."
+sudo -u www-data venv/bin/flask --app app bootstrap
+
+# Uploads from before responsive images have no card/thumb variants yet
+echo "Generating missing image variants..."
+sudo -u www-data venv/bin/flask --app app backfill-images
+
 # Create systemd service file
 sudo tee /etc/systemd/system/ecommerce-backend.service > /dev/null <<EOF
 [Unit]
@@ -123,6 +131,11 @@ User=www-data
 Group=www-data
 WorkingDirectory=$DEPLOY_DIR/backend
 Environment="PATH=$DEPLOY_DIR/backend/venv/bin"
+# Workers share their metrics through files in /run/ecommerce-metrics
+RuntimeDirectory=ecommerce-metrics
+Environment="PROMETHEUS_MULTIPROC_DIR=/run/ecommerce-metrics"
+# nginx sits in front and sets X-Forwarded-For
+Environment="TRUSTED_PROXIES=1"
 ExecStart=$DEPLOY_DIR/backend/venv/bin/gunicorn --workers 4 --bind 127.0.0.1:5000 app:app
 
 [Install]